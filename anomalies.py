@@ -0,0 +1,98 @@
+# === Anomaly engine ===
+# Baseline means, z-scores, percentiles and relative deviations for every climate
+# variable and month in one vectorized pass. Inputs are (..., years, variables,
+# months) arrays, so a single district and a whole state go through the same code;
+# every year's baseline is a window of rows turned into prefix-sum differences.
+#   Baseline.rolling(5)           the 5 calendar years before each year
+#   Baseline.fixed(2015, 2019)    the same fixed window for every year
+#   Baseline.climatology()        every year on record
+from functools import cached_property
+
+import numpy as np
+
+YEAR_AXIS = -3
+
+
+class Baseline:
+    def __init__(self, kind, window=None, start=None, stop=None):
+        self.kind = kind
+        self.window = window
+        self.start = start
+        self.stop = stop
+
+    @classmethod
+    def rolling(cls, years):
+        return cls("rolling", window=years)
+
+    @classmethod
+    def fixed(cls, start, stop):
+        return cls("fixed", start=start, stop=stop)
+
+    @classmethod
+    def climatology(cls):
+        return cls("climatology")
+
+    def bounds(self, years):
+        """(lo, hi) row bounds of each year's baseline within the sorted years."""
+        years = np.asarray(years)
+        if self.kind == "rolling":
+            lo = np.searchsorted(years, years - self.window, side="left")
+            hi = np.searchsorted(years, years - 1, side="right")
+        elif self.kind == "fixed":
+            lo = np.full(len(years), np.searchsorted(years, self.start, side="left"))
+            hi = np.full(len(years), np.searchsorted(years, self.stop, side="right"))
+        elif self.kind == "climatology":
+            lo, hi = np.zeros(len(years), dtype=int), np.full(len(years), len(years))
+        else:
+            raise ValueError(f"unknown baseline kind {self.kind!r}")
+        return lo, hi
+
+
+def _window_sums(values, lo, hi):
+    zero = np.zeros_like(np.take(values, [0], axis=YEAR_AXIS))
+    csum = np.concatenate([zero, np.cumsum(values, axis=YEAR_AXIS)], axis=YEAR_AXIS)
+    return np.take(csum, hi, axis=YEAR_AXIS) - np.take(csum, lo, axis=YEAR_AXIS)
+
+
+class Anomalies:
+    """Anomalies of values (..., years, variables, months) against a baseline.
+
+    Every attribute has the shape of values. Missing values (NaN) are left out of
+    the baseline, and a year with an empty baseline gets NaN throughout (std and
+    zscore also need at least two baseline years).
+    """
+
+    def __init__(self, values, years, baseline):
+        values = np.asarray(values, dtype=float)
+        lo, hi = baseline.bounds(years)
+        valid = ~np.isnan(values)
+        filled = np.where(valid, values, 0.0)
+
+        count = _window_sums(valid.astype(float), lo, hi)
+        total = _window_sums(filled, lo, hi)
+        squares = _window_sums(filled * filled, lo, hi)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            self.mean = total / count
+            variance = (squares - total * self.mean) / (count - 1)
+            # A one-year baseline has no spread to measure against
+            self.std = np.where(count > 1, np.sqrt(np.maximum(variance, 0.0)), np.nan)
+            # Relative deviation, as the dashboard's warnings have always used it
+            self.deviation = (values - self.mean) / (self.mean + 1e-5)
+            self.zscore = np.where(self.std > 0, (values - self.mean) / self.std, np.nan)
+        self._inputs = (values, valid, lo, hi, count)
+
+    @cached_property
+    def percentile(self):
+        """Share of the baseline at or below each value, in percent; computed on first use."""
+        return self._percentile(*self._inputs)
+
+    @staticmethod
+    def _percentile(values, valid, lo, hi, count):
+        # All years at once through a (year × baseline year) window mask: temporaries
+        # are years² × the input size, which is why only callers that read it pay for it
+        rows = np.arange(len(lo))
+        in_window = (rows >= lo[:, None]) & (rows < hi[:, None])
+        at_or_below = (values[..., None, :, :, :] <= values[..., :, None, :, :]) & in_window[:, :, None, None]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            share = at_or_below.sum(axis=YEAR_AXIS) / count * 100
+        return np.where(valid, share, np.nan)
@@ -0,0 +1,287 @@
+# === Read-only metrics API ===
+# Serves the numbers behind the dashboard's yield status (Section 1), monsoon
+# warning (Section 2), seasonal shares (Section 4), monthly rainfall status
+# (Section 6) and per-variable climate anomalies as JSON, computed by the same
+# stats.py functions the sections use:
+#
+#     python api.py --port 8600
+#     curl 'localhost:8600/v1/metrics?state=Assam&district=Jorhat&year=2017'
+#     curl localhost:8600/v1/metrics/batch -d '{"queries": [{"district": "Jorhat", "year": 2017}]}'
+#
+# Each response body is serialized once per (state, district, ingest version, year)
+# and kept in an LRU, so a repeated query is a dict lookup on the event loop; only
+# misses go to a worker thread, which reads them from a snapshot.py bundle when one
+# is current. New ingests are picked up by a periodic refresh.
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from catalog import DEFAULT_STATE, DatasetCatalog
+from snapshot import read_bundle
+from stats import MONTHS, VAR_PREFIX_MAP, monsoon_deviation, monsoon_warning, monthly_rainfall_status
+
+API_CACHE_ENTRIES = int(os.environ.get("API_CACHE_ENTRIES", "50000"))
+REFRESH_SECONDS = float(os.environ.get("API_REFRESH_SECONDS", "2"))
+MAX_BATCH = 1000
+
+logger = logging.getLogger("dashboard.api")
+
+
+class QueryError(ValueError):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _number(value):
+    value = float(value)
+    return None if math.isnan(value) else round(value, 4)
+
+
+def _numbers(mapping):
+    return {k: _number(v) for k, v in mapping.items()}
+
+
+def parse_year(value):
+    # Query strings give "2017", JSON bodies 2017 (or 2017.0); 2017.7 and true are not years
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    raise QueryError("year must be an integer")
+
+
+def district_metrics(loaded, year):
+    """The dashboard's per-year indicators for one loaded district, as plain JSON types."""
+    entry, stats = loaded.entry, loaded.stats
+    df_year = loaded.years.row(loaded.frame, year)
+    current_yield = df_year["yield"].values[0]
+    deviation = monsoon_deviation(stats, year)
+    anomalies, row = stats.anomalies(), stats.row(year)
+    zscores, percentiles = anomalies.zscore[row], anomalies.percentile[row]
+    return {
+        "state": entry.state,
+        "district": entry.name,
+        "year": year,
+        "yield": {
+            "value": _number(current_yield),
+            "category": stats.yield_level(current_yield),
+            "q25": _number(stats.q25),
+            "q75": _number(stats.q75),
+        },
+        "monsoon": {
+            "warning": monsoon_warning(stats, year),
+            "deviation": dict(zip(MONTHS, map(_number, deviation))),
+        },
+        "monthly_rainfall": [
+            {"month": month, "rainfall_mm": _number(curr), "status": level}
+            for month, curr, level in monthly_rainfall_status(df_year, stats, year)
+        ],
+        "seasonal_share_pct": _numbers(stats.season_share(year)),
+        "seasonal_share_of_total_pct": _numbers(stats.season_share_of_total(year)),
+        "seasonal_totals_mm": _numbers(stats.season_totals(year)),
+        # Every variable and month against the district's full climatology
+        "anomalies": {
+            prefix: {
+                month: {"zscore": _number(z), "percentile": _number(p)}
+                for month, z, p in zip(MONTHS, zscores[i], percentiles[i])
+            }
+            for i, prefix in enumerate(VAR_PREFIX_MAP)
+        },
+    }
+
+
+class MetricsService:
+    """Serialized metrics per district-year, in an LRU keyed on the ingest version.
+
+    lookup() and store() are only called from the event loop thread; compute()
+    runs in worker threads.
+    """
+
+    def __init__(self, catalog, max_entries=API_CACHE_ENTRIES):
+        self.catalog = catalog
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = self.misses = 0
+
+    def key(self, query):
+        if not isinstance(query, dict):
+            raise QueryError("each query must be an object with district and year")
+        state = query.get("state")
+        if state is None or state == "":
+            state = DEFAULT_STATE
+        district = query.get("district")
+        if not isinstance(state, str) or not isinstance(district, str):
+            raise QueryError("state and district must be strings")
+        year = parse_year(query.get("year"))
+        entry = self.catalog.index.get(state, {}).get(district)
+        if entry is None:
+            raise QueryError(f"unknown district {district!r} in {state!r}", 404)
+        return state, district, entry.version, year
+
+    def lookup(self, key):
+        body = self.entries.get(key)
+        if body is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return body
+
+    def store(self, key, body):
+        self.misses += 1
+        self.entries[key] = body
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def compute(self, key):
+        state, district, _, year = key
+        bundle = read_bundle(self.catalog.index[state][district], year)
+        if bundle is not None:
+            return json.dumps(bundle.metrics, ensure_ascii=False).encode()
+        try:
+            loaded = self.catalog.load(state, district)
+        except LookupError as e:
+            raise QueryError(str(e), 404) from None
+        if year not in loaded.years:
+            raise QueryError(f"no data for {district} in {year}", 404)
+        return json.dumps(district_metrics(loaded, year), ensure_ascii=False).encode()
+
+    def compute_many(self, keys):
+        results = {}
+        for key in keys:
+            try:
+                results[key] = self.compute(key)
+            except QueryError as e:
+                results[key] = e
+        return results
+
+
+def error_body(message, query=None):
+    body = {"error": message}
+    if query is not None:
+        body["query"] = query
+    return json.dumps(body, ensure_ascii=False).encode()
+
+
+# === HTTP handlers ===
+async def metrics(request):
+    service = request.app.state.service
+    try:
+        key = service.key(dict(request.query_params))
+        body = service.lookup(key)
+        if body is None:
+            body = await run_in_threadpool(service.compute, key)
+            service.store(key, body)
+    except QueryError as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status)
+    return Response(body, media_type="application/json")
+
+
+async def metrics_batch(request):
+    service = request.app.state.service
+    try:
+        queries = (await request.json())["queries"]
+    except (ValueError, KeyError, TypeError):
+        return JSONResponse({"error": 'expected a JSON body {"queries": [...]}'}, status_code=400)
+    if not isinstance(queries, list) or len(queries) > MAX_BATCH:
+        return JSONResponse({"error": f"queries must be a list of at most {MAX_BATCH}"}, status_code=400)
+
+    bodies, missing = [], {}
+    for query in queries:
+        try:
+            key = service.key(query)
+        except QueryError as e:
+            bodies.append(error_body(str(e), query))
+            continue
+        body = service.lookup(key)
+        bodies.append(body if body is not None else key)
+        if body is None:
+            missing[key] = query
+
+    if missing:
+        # All misses of a batch share one trip to the worker pool
+        computed = await run_in_threadpool(service.compute_many, list(missing))
+        for key, body in computed.items():
+            if not isinstance(body, QueryError):
+                service.store(key, body)
+        resolved = []
+        for body in bodies:
+            if not isinstance(body, bytes):
+                result = computed[body]
+                body = result if isinstance(result, bytes) else error_body(str(result), missing[body])
+            resolved.append(body)
+        bodies = resolved
+    return Response(b'{"results":[' + b",".join(bodies) + b"]}", media_type="application/json")
+
+
+async def districts(request):
+    return JSONResponse(request.app.state.service.catalog.state_district_map())
+
+
+async def health(request):
+    service = request.app.state.service
+    return JSONResponse({
+        "status": "ok",
+        "ingest_version": service.catalog.version,
+        "cache": {"entries": len(service.entries), "hits": service.hits, "misses": service.misses},
+    })
+
+
+def create_app(catalog=None):
+    service = MetricsService(catalog or DatasetCatalog.discover())
+
+    async def refresh_loop():
+        while True:
+            await asyncio.sleep(REFRESH_SECONDS)
+            try:
+                await run_in_threadpool(service.catalog.refresh)
+            except Exception:
+                # e.g. a delta file removed mid-refresh; the next tick retries
+                logger.exception("catalog refresh failed")
+
+    @asynccontextmanager
+    async def lifespan(app):
+        task = asyncio.create_task(refresh_loop())
+        try:
+            yield
+        finally:
+            task.cancel()
+
+    app = Starlette(routes=[
+        Route("/healthz", health),
+        Route("/v1/districts", districts),
+        Route("/v1/metrics", metrics),
+        Route("/v1/metrics/batch", metrics_batch, methods=["POST"]),
+    ], lifespan=lifespan)
+    app.state.service = service
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the dashboard's metrics as a read-only JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes (each keeps its own cache)")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+    uvicorn.run("api:create_app", factory=True, host=args.host, port=args.port, workers=args.workers,
+                app_dir=os.path.dirname(os.path.abspath(__file__)), log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+# === Dashboard benchmark harness ===
+# Runs the dashboard's load, section, figure and PDF paths headlessly for every
+# district × year and writes machine-readable results for comparing commits:
+#
+#     python benchmarks/bench.py --out bench_results.json
+#     python benchmarks/bench.py --workbook synthetic_500.xlsx --years 5
+#     python benchmarks/compare.py old.json new.json
+#
+# Sections are run through the same registry app.py uses; outside `streamlit run`
+# the st.* calls are no-ops, so what gets timed is the section's own work.
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import data_store  # noqa: E402
+import figures  # noqa: E402
+from figures import figure_cache  # noqa: E402
+from reports import build_summary_pdf, pdf_bytes  # noqa: E402
+from sections import SECTIONS, SectionContext  # noqa: E402
+from stats import VAR_PREFIX_MAP, build_stats  # noqa: E402
+
+# Bare-mode st.* calls log a missing-script-context warning on every element
+logging.disable(logging.WARNING)
+
+FIGURE_BUILDERS = {
+    "climate_trend": lambda ctx: figures.climate_trend(ctx.df_year, ctx.district, ctx.year),
+    "season_pie": lambda ctx: figures.season_pie(ctx.district_stats, ctx.year),
+    "share_trend": lambda ctx: figures.share_trend(ctx.district_stats),
+    "yield_baseline": lambda ctx: figures.yield_baseline(ctx.df_year, ctx.district_stats),
+    "temperature": lambda ctx: figures.temperature(ctx.df_year, ctx.district_stats, ctx.year),
+    "accumulated_rain": lambda ctx: figures.accumulated_rain(ctx.df_year, ctx.district_stats),
+    "season_bar": lambda ctx: figures.season_bar(ctx.district_stats, ctx.year),
+    "monsoon_bullet": lambda ctx: figures.monsoon_bullet(ctx.district_stats, ctx.year),
+    "climate_bars": lambda ctx: [figures.climate_bar(ctx.df_year, ctx.district_stats, ctx.district, ctx.year, p)
+                                 for p in VAR_PREFIX_MAP],
+    "min_temperature": lambda ctx: figures.min_temperature(ctx.df_year, ctx.district_stats, ctx.year),
+    "max_temperature": lambda ctx: figures.max_temperature(ctx.df_year, ctx.district_stats, ctx.year),
+}
+
+
+def summarize(samples):
+    ms = np.asarray(samples) * 1000
+    return {
+        "n": int(ms.size),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p90_ms": float(np.percentile(ms, 90)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max()),
+    }
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_load(path):
+    """Cold start (xlsx parse + store build) versus warm start (memory-mapped store)."""
+    cache_dir = tempfile.mkdtemp(prefix="dashboard-bench-")
+    previous = data_store.CACHE_DIR
+    data_store.CACHE_DIR = cache_dir
+    try:
+        cold, _ = timed(data_store.load_indexed, path)
+        warm, (frames, year_index) = timed(data_store.load_indexed, path)
+    finally:
+        data_store.CACHE_DIR = previous
+        shutil.rmtree(cache_dir, ignore_errors=True)
+    stats_build, stats = timed(build_stats, frames)
+    return {"cold_s": cold, "warm_s": warm, "stats_build_s": stats_build}, frames, year_index, stats
+
+
+def contexts(frames, year_index, stats, state, years_per_district=None):
+    for district, df in frames.items():
+        years = year_index[district].years
+        if years_per_district:
+            years = years[-years_per_district:]
+        for year in years:
+            yield SectionContext(state, district, int(year), df, year_index[district], stats[district])
+
+
+def bench_sections(ctxs, warm):
+    samples = {s.key: [] for s in SECTIONS}
+    for ctx in ctxs:
+        if not warm:
+            figure_cache.clear()
+        for section in SECTIONS:
+            elapsed, _ = timed(section.run, ctx)
+            samples[section.key].append(elapsed)
+    return samples
+
+
+def bench_figures(ctxs):
+    samples = {chart: [] for chart in FIGURE_BUILDERS}
+    for ctx in ctxs:
+        for chart, build in FIGURE_BUILDERS.items():
+            elapsed, _ = timed(build, ctx)
+            samples[chart].append(elapsed)
+    return samples
+
+
+def bench_pdf(ctxs):
+    samples = []
+    for ctx in ctxs:
+        elapsed, _ = timed(lambda: pdf_bytes(build_summary_pdf(
+            ctx.df_year, ctx.district_stats, ctx.district_years, ctx.year, ctx.district, ctx.state)))
+        samples.append(elapsed)
+    return samples
+
+
+def bench_memory(path, state):
+    """Peak Python allocations for a full load + one pass over every section."""
+    tracemalloc.start()
+    _, frames, year_index, stats = bench_load(path)
+    figure_cache.clear()
+    bench_sections(contexts(frames, year_index, stats, state, years_per_district=1), warm=False)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def run(path, state="Assam", years_per_district=None, warm=False, memory=True):
+    load, frames, year_index, stats = bench_load(path)
+    ctxs = list(contexts(frames, year_index, stats, state, years_per_district))
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "workbook": os.path.basename(path),
+            "districts": len(frames),
+            "district_years": len(ctxs),
+            "warm_figure_cache": warm,
+        },
+        "load": load,
+        "sections": {k: summarize(v) for k, v in bench_sections(ctxs, warm).items()},
+        "figures": {k: summarize(v) for k, v in bench_figures(ctxs).items()},
+        "pdf": summarize(bench_pdf(ctxs)),
+    }
+    if memory:
+        results["memory"] = {"tracemalloc_peak_mb": bench_memory(path, state) / 2**20}
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results.setdefault("memory", {})["peak_rss_mb"] = rss / (2**20 if sys.platform == "darwin" else 2**10)
+    return results
+
+
+def print_report(results):
+    meta, load = results["meta"], results["load"]
+    print(f"{meta['districts']} districts, {meta['district_years']} district-years @ {meta['commit']}")
+    print(f"load: cold {load['cold_s']:.3f}s  warm {load['warm_s']:.3f}s  stats {load['stats_build_s']:.3f}s")
+    for group in ("sections", "figures"):
+        print(f"\n{group:<20}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}")
+        for key, s in results[group].items():
+            print(f"{key:<20}{s['p50_ms']:>10.2f}{s['p90_ms']:>10.2f}{s['p99_ms']:>10.2f}")
+    pdf = results["pdf"]
+    print(f"\npdf                 {pdf['p50_ms']:>10.2f}{pdf['p90_ms']:>10.2f}{pdf['p99_ms']:>10.2f}")
+    print("memory: " + "  ".join(f"{k} {v:.1f}" for k, v in results["memory"].items()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's compute and render paths.")
+    parser.add_argument("--workbook", default=os.path.join(ROOT, data_store.WORKBOOK))
+    parser.add_argument("--state", default="Assam")
+    parser.add_argument("--years", type=int, help="Only the latest N years per district")
+    parser.add_argument("--warm", action="store_true", help="Keep the figure cache between district-years")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--out", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    results = run(args.workbook, args.state, args.years, args.warm, not args.no_memory)
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=1)
+    print_report(results)
+    print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
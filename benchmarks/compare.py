@@ -0,0 +1,55 @@
+# === Compare two benchmark result files ===
+#     python benchmarks/compare.py baseline.json candidate.json [--threshold 0.10]
+# Exits non-zero when any p50 latency or load time regresses by more than the threshold.
+import argparse
+import json
+import sys
+
+
+def metrics(results):
+    out = {f"load.{k}": v * 1000 for k, v in results["load"].items()}
+    for group in ("sections", "figures"):
+        for key, s in results.get(group, {}).items():
+            out[f"{group}.{key}.p50"] = s["p50_ms"]
+            out[f"{group}.{key}.p99"] = s["p99_ms"]
+    for key, s in results.get("startup", {}).items():
+        out[f"startup.{key}.p50"] = s["p50_ms"]
+    if "pdf" in results:
+        out["pdf.p50"] = results["pdf"]["p50_ms"]
+    for key, v in results.get("memory", {}).items():
+        out[f"memory.{key}"] = v
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files.")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed relative slowdown")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline) as f:
+        base = json.load(f)
+    with open(args.candidate) as f:
+        cand = json.load(f)
+    print(f"baseline {base['meta'].get('commit')} -> candidate {cand['meta'].get('commit')}")
+
+    old, new = metrics(base), metrics(cand)
+    regressions = []
+    print(f"{'metric':<40}{'baseline':>12}{'candidate':>12}{'change':>10}")
+    for key in sorted(set(old) & set(new)):
+        change = (new[key] - old[key]) / old[key] if old[key] else 0.0
+        flag = ""
+        # p99 and memory are reported but too noisy to gate on
+        if change > args.threshold and (key.endswith(".p50") or key.startswith("load.")):
+            regressions.append(key)
+            flag = "  !"
+        print(f"{key:<40}{old[key]:>12.2f}{new[key]:>12.2f}{change:>+10.1%}{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
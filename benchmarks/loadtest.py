@@ -0,0 +1,156 @@
+# === Concurrent session load test ===
+# Simulates N dashboard sessions opening the same district-years at the same
+# moment (a field training, a link shared in a group chat) and compares the run
+# with and without single-flight deduplication:
+#
+#     python benchmarks/loadtest.py --sessions 16
+#     python benchmarks/loadtest.py --sessions 32 --targets 4 --out loadtest_results.json
+#
+# Each mode runs in a fresh interpreter, so every session starts on cold caches.
+# A session is one thread doing what a rerun does for its district-year: load the
+# district, run every section (lazy ones included, as if all were opened) and
+# build both exports. Sessions are spread round-robin over --targets district-years.
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def session(catalog, state, district, year):
+    import sections
+    from sections import SECTIONS, SectionContext, trend_tables
+
+    loaded = catalog.load(state, district)
+    ctx = SectionContext(state, district, year, loaded.frame, loaded.years, loaded.stats, loaded.version)
+    for section in SECTIONS:
+        section.run(ctx)
+    sections.summary_pdf(ctx.cache_key, year, ctx.df_year, loaded.stats, loaded.years)
+    left, right = trend_tables(loaded.stats, loaded.years, year)
+    if left is not None and right is not None:
+        sections.trend_excel(ctx.cache_key, year, left, right)
+
+
+def run_sessions(n, targets):
+    """Start n sessions together; returns per-session latencies and how often work was shared."""
+    # Sections run without a Streamlit session; silence its bare-mode warnings
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+    logging.disable(logging.WARNING)
+    from catalog import DatasetCatalog
+    from figures import figure_cache
+    from reports import exports
+
+    catalog = DatasetCatalog.discover()
+    barrier = threading.Barrier(n)
+    latencies = [None] * n
+    errors = []
+
+    def worker(i):
+        state, district, year = targets[i % len(targets)]
+        barrier.wait()
+        start = time.perf_counter()
+        try:
+            session(catalog, state, district, year)
+        except Exception as e:  # reported, and the run fails below
+            errors.append(f"{type(e).__name__}: {e}")
+        latencies[i] = time.perf_counter() - start
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    cpu = time.process_time()
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {
+        "wall_s": time.perf_counter() - start,
+        "cpu_s": time.process_time() - cpu,
+        "latencies_s": latencies,
+        "errors": errors,
+        "figure_builds": figure_cache.misses,
+        "shared": {
+            "district_loads": catalog.flights.shared,
+            "figure_builds": figure_cache.flights.shared,
+            "exports": exports.shared,
+        },
+    }
+
+
+def run_mode(single_flight, n, targets):
+    env = dict(os.environ, DASHBOARD_SINGLE_FLIGHT="1" if single_flight else "0")
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", "--sessions", str(n),
+           "--targets-json", json.dumps(targets)]
+    out = subprocess.run(cmd, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    if result["errors"]:
+        raise RuntimeError(f"session failed: {result['errors'][0]}")
+    return result
+
+
+def pick_targets(state, count):
+    from catalog import DatasetCatalog
+    catalog = DatasetCatalog.discover()
+    targets = []
+    for district in catalog.districts(state):
+        years = catalog.load(state, district).years.years
+        targets.append((state, district, int(years[-1])))
+        if len(targets) == count:
+            break
+    return targets
+
+
+def print_report(results):
+    from bench import summarize
+
+    print(f"{results['sessions']} sessions over {len(results['targets'])} district-year(s): "
+          + ", ".join(f"{d} {y}" for _, d, y in results["targets"]))
+    print(f"\n{'mode':<16}{'wall s':>8}{'cpu s':>8}{'sess/s':>8}{'p50 ms':>9}{'p90 ms':>9}"
+          f"{'figures':>9}{'shared':>8}")
+    for mode, r in results["modes"].items():
+        s = summarize(r["latencies_s"])
+        print(f"{mode:<16}{r['wall_s']:>8.2f}{r['cpu_s']:>8.2f}{results['sessions'] / r['wall_s']:>8.1f}"
+              f"{s['p50_ms']:>9.0f}{s['p90_ms']:>9.0f}{r['figure_builds']:>9}{sum(r['shared'].values()):>8}")
+    modes = results["modes"]
+    if "off" in modes and "single-flight" in modes:
+        print(f"\nthroughput x{modes['off']['wall_s'] / modes['single-flight']['wall_s']:.2f} with single-flight")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the dashboard with concurrent sessions.")
+    parser.add_argument("--sessions", type=int, default=16)
+    parser.add_argument("--state", default="Assam")
+    parser.add_argument("--targets", type=int, default=1, help="Distinct district-years the sessions open")
+    parser.add_argument("--out", help="Also write the results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--targets-json", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(run_sessions(args.sessions, [tuple(t) for t in json.loads(args.targets_json)])))
+        return
+
+    targets = pick_targets(args.state, args.targets)
+    results = {
+        "sessions": args.sessions,
+        "targets": targets,
+        "modes": {
+            "off": run_mode(False, args.sessions, targets),
+            "single-flight": run_mode(True, args.sessions, targets),
+        },
+    }
+    print_report(results)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=1)
+        print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
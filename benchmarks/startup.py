@@ -0,0 +1,139 @@
+# === Dashboard cold-start benchmark ===
+# Measures how long a fresh process takes to paint the dashboard, and where its
+# import time goes:
+#
+#     python benchmarks/startup.py --runs 5 --out startup_results.json
+#     python benchmarks/compare.py old_startup.json startup_results.json
+#
+# Each run starts a new interpreter and renders app.py once with Streamlit's
+# AppTest, so nothing is imported or cached beforehand. Paint times are the ones
+# app.py itself records (instrumentation.RerunProfile.painted): from the start of
+# the rerun until a section was sent. The import profile comes from
+# `python -X importtime` over the modules app.py imports at startup.
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench import git_commit, summarize  # noqa: E402
+
+# What app.py imports before the header is drawn
+STARTUP_IMPORTS = ["streamlit", "instrumentation", "catalog", "figures", "sections", "snapshot"]
+# Loaded only by the sections and exports that use them; none should be on the startup path.
+# Plotly is not listed: importing streamlit already loads plotly.graph_objects and plotly.io
+DEFERRED_MODULES = ["fpdf", "openpyxl", "xlsxwriter", "sklearn", "comparison", "scipy"]
+
+COLD_RUN = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.logger import set_log_level
+set_log_level("error")
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file({app!r}, default_timeout=120)
+at.run()
+import instrumentation
+paints = {{key: s["sum"] for (key, start), s in instrumentation.registry.paints.items() if start == "cold"}}
+print(json.dumps({{
+    "streamlit_import_s": imported - started,
+    "rerun_s": time.perf_counter() - imported,
+    "paints": paints,
+    "exception": [str(e.value) for e in at.exception],
+    "deferred_loaded": [m for m in {deferred!r} if m in sys.modules],
+}}))
+"""
+
+
+def cold_start(app=os.path.join(ROOT, "app.py")):
+    """Render app.py once in a fresh interpreter; returns the child's measurements."""
+    code = COLD_RUN.format(app=app, deferred=DEFERRED_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    if result["exception"]:
+        raise RuntimeError(f"app.py raised: {result['exception'][0]}")
+    return result
+
+
+def import_profile(modules=STARTUP_IMPORTS):
+    """Per-package import time of a fresh `import <modules>`, from -X importtime."""
+    code = "; ".join(f"import {m}" for m in modules)
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT,
+                         capture_output=True, text=True, check=True)
+    self_us, top_level = {}, {}
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue  # the header row
+        package = name.strip().split(".")[0]
+        self_us[package] = self_us.get(package, 0) + int(own)
+        if name.strip() in modules:
+            top_level[name.strip()] = int(cumulative) / 1000
+    packages = sorted(((p, us / 1000) for p, us in self_us.items()), key=lambda item: -item[1])
+    return {"total_ms": sum(self_us.values()) / 1000, "imports_ms": top_level, "packages_ms": dict(packages)}
+
+
+def run(runs=5, app=os.path.join(ROOT, "app.py")):
+    samples = [cold_start(app) for _ in range(runs)]
+    paint_keys = sorted(set().union(*(s["paints"] for s in samples)), key=lambda k: samples[0]["paints"].get(k, 0))
+    startup = {
+        "streamlit_import": summarize([s["streamlit_import_s"] for s in samples]),
+        "rerun": summarize([s["rerun_s"] for s in samples]),
+    }
+    for key in paint_keys:
+        startup[f"paint_{key}"] = summarize([s["paints"][key] for s in samples if key in s["paints"]])
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": runs,
+        },
+        "startup": startup,
+        "deferred_loaded": sorted(set().union(*(s["deferred_loaded"] for s in samples))),
+        "imports": import_profile(),
+    }
+
+
+def print_report(results, top=12):
+    meta = results["meta"]
+    print(f"{meta['runs']} cold start(s) @ {meta['commit']}")
+    print(f"\n{'startup':<32}{'p50 ms':>10}{'p90 ms':>10}{'max ms':>10}")
+    for key, s in results["startup"].items():
+        print(f"{key:<32}{s['p50_ms']:>10.1f}{s['p90_ms']:>10.1f}{s['max_ms']:>10.1f}")
+    deferred = results["deferred_loaded"]
+    print(f"\ndeferred modules loaded by the first rerun: {', '.join(deferred) if deferred else 'none'}")
+
+    imports = results["imports"]
+    print(f"\nimport time {imports['total_ms']:.0f} ms")
+    for name, ms in imports["imports_ms"].items():
+        print(f"  import {name:<24}{ms:>10.1f} ms (cumulative)")
+    print(f"\n{'package':<32}{'self ms':>10}")
+    for name, ms in list(imports["packages_ms"].items())[:top]:
+        print(f"{name:<32}{ms:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the dashboard's cold-start paint times and import profile.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to start")
+    parser.add_argument("--app", default=os.path.join(ROOT, "app.py"))
+    parser.add_argument("--out", default="startup_results.json")
+    args = parser.parse_args(argv)
+
+    results = run(args.runs, os.path.abspath(args.app))
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=1)
+    print_report(results)
+    print(f"\nResults written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
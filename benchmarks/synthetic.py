@@ -0,0 +1,58 @@
+# === Synthetic workbook generator ===
+# Scales the district workbook up for load testing by cloning real districts with
+# small multiplicative noise on every climate/yield column:
+#
+#     python benchmarks/synthetic.py --districts 500 --out synthetic_500.xlsx
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from data_store import WORKBOOK, parse_workbook  # noqa: E402
+
+FIXED_COLUMNS = {"year", "location_name"}
+
+
+def synthesize(source, n_districts, noise=0.05, seed=0):
+    rng = np.random.default_rng(seed)
+    names = list(source)
+    out = {}
+    for i in range(n_districts):
+        base_name = names[i % len(names)]
+        df = source[base_name].copy()
+        name = f"{base_name[:20]}_{i:04d}"
+        for col in df.columns:
+            if col in FIXED_COLUMNS or not pd.api.types.is_numeric_dtype(df[col]):
+                continue
+            if col in ("latitude", "longitude"):
+                df[col] = df[col] + rng.normal(0, 0.5)
+            else:
+                df[col] = df[col] * rng.normal(1.0, noise, len(df))
+        df["location_name"] = name
+        out[name] = df
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a scaled-up synthetic district workbook.")
+    parser.add_argument("--source", default=os.path.join(ROOT, WORKBOOK))
+    parser.add_argument("--districts", type=int, default=500)
+    parser.add_argument("--noise", type=float, default=0.05, help="Relative std-dev of the per-value noise")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="synthetic_districts.xlsx")
+    args = parser.parse_args(argv)
+
+    frames = synthesize(parse_workbook(args.source), args.districts, args.noise, args.seed)
+    with pd.ExcelWriter(args.out, engine="xlsxwriter") as writer:
+        for name, df in frames.items():
+            df.to_excel(writer, index=False, sheet_name=name)
+    print(f"Wrote {len(frames)} districts to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
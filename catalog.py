@@ -0,0 +1,255 @@
+# === Dataset catalog ===
+# Indexes district data across states and files without loading it. Sources are:
+#   - the dashboard's own workbook (WORKBOOK), filed under DEFAULT_STATE,
+#   - anything under DATA_DIR, filed under its first folder name:
+#       data/<State>/<anything>.xlsx      one district per sheet
+#       data/<State>/<District>.parquet   one district per file (.feather too)
+# The state -> district index comes from file names, sheet names and store
+# manifests alone; a district's frame is read only when it is selected and kept in
+# a byte-bounded LRU (DISTRICT_CACHE_MB) together with its YearIndex and stats.
+# Rows added with ingest.py (or rolled up from daily records by daily.py) are
+# overlaid on their district's source rows; refresh() picks up new ingests and
+# reloads only the districts they touched. Concurrent loads of one district (or
+# builds of one state's cube) share a single read through a SingleFlight.
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from compact import COMPACT_ENABLED, load_compact_sheet
+from data_store import WORKBOOK, YearIndex, index_by_year, load_sheet, workbook_sheets
+from ingest import INGEST_DIR, INGEST_MANIFEST, VALUE_COLUMNS, read_delta, upsert
+from ingest import read_manifest as read_ingest_manifest
+from singleflight import SingleFlight
+from stats import DistrictStats
+
+DATA_DIR = os.environ.get("DASHBOARD_DATA_DIR", "data")
+DEFAULT_STATE = os.environ.get("DASHBOARD_DEFAULT_STATE", "Assam")
+DISTRICT_CACHE_MB = float(os.environ.get("DISTRICT_CACHE_MB", "256"))
+WORKBOOK_EXTS = (".xlsx",)
+COLUMNAR_EXTS = (".parquet", ".feather")
+
+
+class DistrictEntry:
+    def __init__(self, state, name, path, sheet=None, delta=None, ingest_root=None):
+        self.state = state
+        self.name = name
+        self.path = path  # None for districts that only exist as ingested rows
+        self.sheet = sheet  # None for one-district columnar files
+        self.delta = delta
+        self.ingest_root = ingest_root
+        self.version = delta["version"] if delta else 0
+
+    def with_delta(self, delta, ingest_root):
+        return DistrictEntry(self.state, self.name, self.path, self.sheet, delta, ingest_root)
+
+    def read_source(self):
+        if self.sheet is not None:
+            if COMPACT_ENABLED:
+                return load_compact_sheet(self.path, self.sheet)
+            return load_sheet(self.path, self.sheet)
+        if self.path.endswith(".feather"):
+            from pyarrow import feather
+            return feather.read_table(self.path, memory_map=True).to_pandas().dropna()
+        return pd.read_parquet(self.path).dropna()
+
+    def read(self, complete=True):
+        frame = self.read_source() if self.path else None
+        if self.delta is not None:
+            merged = upsert(frame, read_delta(self.ingest_root, self.delta))
+            if frame is not None:
+                merged = merged[frame.columns]
+            if complete:
+                # Years still missing values (e.g. daily rollups awaiting yield) are left out,
+                # like incomplete rows in the source files; so is every year of a district
+                # whose ingested rows never had a yield column
+                merged = merged.reindex(columns=merged.columns.union(["yield"], sort=False))
+                merged = merged.dropna(subset=[c for c in VALUE_COLUMNS if c in merged])
+            frame = merged
+        return frame
+
+
+class LoadedDistrict:
+    """A district's year-indexed frame plus everything derived from its whole history."""
+
+    def __init__(self, entry, frame):
+        if frame.empty:
+            raise LookupError(f"{entry.name} ({entry.state}) has no complete years yet")
+        self.entry = entry
+        self.version = entry.version
+        self.frame = index_by_year(frame)
+        self.years = YearIndex(self.frame.index)
+        self.stats = DistrictStats(self.frame)
+        arrays = [v for v in vars(self.stats).values() if isinstance(v, np.ndarray)]
+        self.nbytes = int(self.frame.memory_usage(index=True, deep=True).sum()) + sum(a.nbytes for a in arrays)
+
+
+def _add(index, entry):
+    # First source wins when two files define the same district for a state
+    index.setdefault(entry.state, {}).setdefault(entry.name, entry)
+
+
+def discover(root=DATA_DIR, workbook=WORKBOOK, default_state=DEFAULT_STATE):
+    """{state: {district: DistrictEntry}}, built from names and metadata only."""
+    index = {}
+    if workbook and os.path.exists(workbook):
+        for sheet in workbook_sheets(workbook):
+            _add(index, DistrictEntry(default_state, sheet, workbook, sheet))
+    if not root or not os.path.isdir(root):
+        return index
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        rel = os.path.relpath(dirpath, root)
+        state = default_state if rel == "." else rel.split(os.sep)[0]
+        for file_name in sorted(filenames):
+            path = os.path.join(dirpath, file_name)
+            stem, ext = os.path.splitext(file_name)
+            if file_name.startswith((".", "~$")):
+                continue
+            if ext in WORKBOOK_EXTS:
+                for sheet in workbook_sheets(path):
+                    _add(index, DistrictEntry(state, sheet, path, sheet))
+            elif ext in COLUMNAR_EXTS:
+                _add(index, DistrictEntry(state, stem, path))
+    return index
+
+
+class DatasetCatalog:
+    def __init__(self, index, max_bytes=int(DISTRICT_CACHE_MB * 2**20), ingest_root=INGEST_DIR):
+        self.index = index
+        self.max_bytes = max_bytes
+        self.loaded = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+        # One lock per source file, so a workbook's store is only built once at a time
+        self.source_locks = {}
+        # Sessions asking for a district or cube that is still being built wait for that build
+        self.flights = SingleFlight()
+        self.ingest_root = ingest_root
+        self.ingest_stamp = None
+        self.version = 0
+        self.state_versions = {}
+        self.cubes = {}
+        self.refresh()
+
+    @classmethod
+    def discover(cls, root=DATA_DIR, workbook=WORKBOOK, default_state=DEFAULT_STATE, **kwargs):
+        return cls(discover(root, workbook, default_state), **kwargs)
+
+    def refresh(self):
+        """Apply ingests made since the last call; returns {state: [districts changed]}.
+
+        Cheap when nothing changed (one stat of the ingest manifest), so app.py calls
+        it on every rerun.
+        """
+        if not self.ingest_root:
+            return {}
+        try:
+            stat = os.stat(os.path.join(self.ingest_root, INGEST_MANIFEST))
+        except OSError:
+            return {}
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self.ingest_stamp:
+            return {}
+
+        with self.lock:
+            if stamp == self.ingest_stamp:
+                return {}
+            manifest = read_ingest_manifest(self.ingest_root)
+            # Entries are replaced, never mutated, so readers holding the old index stay consistent
+            index = {state: dict(districts) for state, districts in self.index.items()}
+            changed = {}
+            for state, districts in manifest["districts"].items():
+                for district, delta in districts.items():
+                    if delta["version"] <= self.version:
+                        continue
+                    entry = index.get(state, {}).get(district) or DistrictEntry(state, district, None)
+                    entry = entry.with_delta(delta, self.ingest_root)
+                    if entry.path is None and entry.read().empty:
+                        # Only partial rows so far (e.g. daily rollups awaiting yield): the
+                        # district is listed once it has a complete year
+                        continue
+                    index.setdefault(state, {})[district] = entry
+                    evicted = self.loaded.pop((state, district), None)
+                    if evicted is not None:
+                        self.size -= evicted.nbytes
+                    changed.setdefault(state, []).append(district)
+                    self.state_versions[state] = max(self.state_versions.get(state, 0), delta["version"])
+            self.index = index
+            self.version = manifest["version"]
+            self.ingest_stamp = stamp
+            cubes = {state: self.cubes[state] for state in changed if state in self.cubes}
+
+        # Comparison cubes already built only re-derive the districts that changed
+        for state, cube in cubes.items():
+            frames = {d: index_by_year(index[state][d].read()) for d in changed[state]}
+            with self.lock:
+                self.cubes[state] = cube.updated(frames, self.state_versions[state])
+        return changed
+
+    def states(self):
+        return list(self.index)
+
+    def districts(self, state):
+        return list(self.index[state])
+
+    def state_district_map(self):
+        return {state: list(districts) for state, districts in self.index.items()}
+
+    def read_state(self, state):
+        """Every district frame of a state, read straight from source (bypasses the LRU)."""
+        return {district: index_by_year(entry.read()) for district, entry in self.index[state].items()}
+
+    def cube(self, state):
+        """The state's cross-district comparison cube, built on first use."""
+        version = self.state_versions.get(state, 0)
+        cube = self.cubes.get(state)
+        if cube is None or cube.version != version:
+            cube = self.flights.do(("cube", state, version), lambda: self._build_cube(state, version))
+        return cube
+
+    def _build_cube(self, state, version):
+        from comparison import StateCube
+        cube = StateCube.from_frames(self.read_state(state), version)
+        with self.lock:
+            self.cubes[state] = cube
+        return cube
+
+    def load(self, state, district):
+        key = (state, district)
+        with self.lock:
+            entry = self.index[state][district]
+            loaded = self.loaded.get(key)
+            if loaded is not None and loaded.version == entry.version:
+                self.loaded.move_to_end(key)
+                return loaded
+            source_lock = self.source_locks.setdefault(entry.path, threading.Lock())
+        return self.flights.do((state, district, entry.version), lambda: self._read(key, entry, source_lock))
+
+    def _read(self, key, entry, source_lock):
+        with source_lock:
+            with self.lock:
+                loaded = self.loaded.get(key)
+            if loaded is None or loaded.version != entry.version:
+                loaded = LoadedDistrict(entry, entry.read())
+                self.put(key, loaded)
+        return loaded
+
+    def put(self, key, loaded):
+        with self.lock:
+            # A load that was running when refresh() applied a newer ingest must not
+            # put the old rows back; its caller still gets them, later loads re-read
+            current = self.index.get(key[0], {}).get(key[1])
+            if current is None or current.version != loaded.version:
+                return
+            if key in self.loaded:
+                self.size -= self.loaded.pop(key).nbytes
+            self.loaded[key] = loaded
+            self.size += loaded.nbytes
+            # Never evict the district just loaded, even if it alone exceeds the bound
+            while self.size > self.max_bytes and len(self.loaded) > 1:
+                _, evicted = self.loaded.popitem(last=False)
+                self.size -= evicted.nbytes
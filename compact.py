@@ -0,0 +1,64 @@
+# === Compact float32 district arrays ===
+# Optional (DASHBOARD_COMPACT=1): workbook districts are read from one float32
+# (fields × years) .npy per sheet, memory-mapped read-only. Rows after the first
+# four are the climate columns, so values[4:].reshape(variables, months, years) is
+# the variables × months × years layout. The DataFrame handed to the dashboard is
+# a zero-copy view of the mapping, so every process serving the same store shares
+# one copy of the data through the page cache instead of holding its own float64
+# frame. Values are rounded to float32 (about 7 significant digits).
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_store import atomic_path, check_fresh, load_sheet, read_manifest, store_dir
+from stats import CLIMATE_COLUMNS
+
+COMPACT_ENABLED = os.environ.get("DASHBOARD_COMPACT") == "1"
+FIELDS = ["year", "latitude", "longitude", "yield"] + CLIMATE_COLUMNS
+
+
+def compact_path(store, manifest, entry):
+    # Tagged with the workbook hash, so a rebuilt store never reuses stale arrays
+    stem = os.path.splitext(entry["file"])[0]
+    return os.path.join(store, f"{stem}.{manifest['sha256'][:12]}.f32.npy")
+
+
+def write_compact(path, frame):
+    values = frame.sort_values("year", kind="stable")[FIELDS].to_numpy(dtype=np.float32).T
+    # np.save appends .npy to any other name
+    with atomic_path(path, ".tmp.npy") as tmp:
+        np.save(tmp, np.ascontiguousarray(values))
+
+
+def read_compact(path, name):
+    values = np.load(path, mmap_mode="r")
+    frame = pd.DataFrame(values[1:].T, columns=FIELDS[1:], copy=False)
+    frame.insert(0, "year", values[0].astype(np.int64))
+    frame.insert(3, "location_name", name)
+    return frame
+
+
+def load_compact_sheet(workbook, sheet):
+    """A workbook sheet as a memory-mapped float32 frame, written on first use.
+
+    Sheets missing any of the expected columns are returned as regular frames.
+    """
+    store = store_dir(workbook)
+    manifest = read_manifest(store)
+    frame = None
+    if not check_fresh(workbook, manifest)[0]:
+        frame = load_sheet(workbook, sheet)  # builds the store
+        manifest = read_manifest(store)
+
+    entry = next((e for e in manifest["sheets"] if e["name"] == sheet), None)
+    if entry is None:
+        raise KeyError(sheet)
+    path = compact_path(store, manifest, entry)
+    if not os.path.exists(path):
+        if frame is None:
+            frame = load_sheet(workbook, sheet)
+        if not set(FIELDS) <= set(frame.columns):
+            return frame
+        write_compact(path, frame)
+    return read_compact(path, sheet)
@@ -0,0 +1,160 @@
+# === Cross-district comparison ===
+# Every district of a state stacked into one (districts × years × variables) array,
+# so ranking all districts for a year is a handful of vectorized reductions instead
+# of one DataFrame pass per district. Derived metrics are computed for every
+# district and year when the cube is built; a rerun only slices them.
+import warnings
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+import figures
+from anomalies import Anomalies, Baseline
+from figures import figure_cache
+from stats import BASELINE_YEARS, MONTH_NUMS, SEASON_MONTHS, VAR_PREFIX_MAP
+
+ANOMALY_Z = 2.0
+CUBE_VARIABLES = ["yield"] + [f"{prefix}_{m}" for prefix in VAR_PREFIX_MAP for m in MONTH_NUMS]
+METRICS = {
+    "yield": "Yield (tons/ha)",
+    "yield_percentile": "Yield percentile (own history)",
+    "monsoon_deviation": "Monsoon rainfall vs 2015–2019 avg (%)",
+    "temperature_anomaly": "Temperature vs 2015–2019 avg (°C)",
+    "anomaly_count": "Climate anomalies (variable-months, |z| > 2)",
+    **{prefix: f"{label}, June–Dec mean" for prefix, label in VAR_PREFIX_MAP.items()},
+}
+
+
+def _stack(frames, years):
+    values = np.full((len(frames), len(years), len(CUBE_VARIABLES)), np.nan)
+    for i, df in enumerate(frames.values()):
+        rows = np.searchsorted(years, df["year"].to_numpy())
+        values[i, rows] = df.reindex(columns=CUBE_VARIABLES).to_numpy(dtype=float)
+    return values
+
+
+def derive(values, years):
+    """{metric: (districts × years) array} for every entry of METRICS.
+
+    Every metric only looks along its own district's row, so a subset of districts
+    can be derived on its own.
+    """
+    n_months = len(MONTH_NUMS)
+    yields = values[:, :, 0]
+    # (districts × years × prefix × month) view of the monthly climate columns
+    monthly = values[:, :, 1:].reshape(yields.shape + (len(VAR_PREFIX_MAP), n_months))
+    baseline = (years >= BASELINE_YEARS[0]) & (years <= BASELINE_YEARS[1])
+    prefixes = list(VAR_PREFIX_MAP)
+
+    with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+        # nanmean over a district with no baseline years is expected to be NaN
+        warnings.simplefilter("ignore", RuntimeWarning)
+        # Share of the district's own years with a yield at or below this one
+        valid = ~np.isnan(yields)
+        at_or_below = (yields[:, None, :] <= yields[:, :, None]).sum(axis=2)
+        percentile = np.where(valid, at_or_below / valid.sum(axis=1, keepdims=True) * 100, np.nan)
+
+        rain = monthly[:, :, prefixes.index("precip_flux")]
+        monsoon_months = [MONTH_NUMS.index(m) for m in SEASON_MONTHS["Monsoon"]]
+        monsoon = np.where(np.isnan(rain[:, :, monsoon_months]).all(axis=2), np.nan,
+                           np.nansum(rain[:, :, monsoon_months], axis=2))
+        monsoon_base = np.nanmean(monsoon[:, baseline], axis=1, keepdims=True)
+
+        season_means = np.nanmean(monthly, axis=3)
+        temp = season_means[:, :, prefixes.index("temp")]
+        temp_base = np.nanmean(temp[:, baseline], axis=1, keepdims=True)
+
+        # Every variable and month against each district's own climatology
+        zscore = Anomalies(monthly, years, Baseline.climatology()).zscore
+        has_climate = ~np.isnan(monthly).all(axis=(2, 3))
+        anomaly_count = np.where(has_climate, (np.abs(zscore) > ANOMALY_Z).sum(axis=(2, 3)), np.nan)
+
+        metrics = {
+            "yield": yields,
+            "yield_percentile": percentile,
+            "monsoon_deviation": (monsoon - monsoon_base) / monsoon_base * 100,
+            "temperature_anomaly": temp - temp_base,
+            "anomaly_count": anomaly_count,
+        }
+    for i, prefix in enumerate(prefixes):
+        metrics[prefix] = season_means[:, :, i]
+    return metrics
+
+
+class StateCube:
+    def __init__(self, districts, years, values, metrics, version=0):
+        self.districts = districts
+        self.years = years
+        self.values = values
+        self.metrics = metrics
+        self.version = version
+
+    @classmethod
+    def from_frames(cls, frames, version=0):
+        years = np.unique(np.concatenate([df["year"].to_numpy() for df in frames.values()]))
+        values = _stack(frames, years)
+        return cls(list(frames), years, values, derive(values, years), version)
+
+    def updated(self, frames, version):
+        """A new cube with these districts replaced or added; the others' rows are reused as-is."""
+        districts = self.districts + [d for d in frames if d not in self.districts]
+        years = np.union1d(self.years, np.concatenate([df["year"].to_numpy() for df in frames.values()]))
+        old_rows = np.searchsorted(years, self.years)
+        n_old = len(self.districts)
+
+        values = np.full((len(districts), len(years), len(CUBE_VARIABLES)), np.nan)
+        values[:n_old, old_rows] = self.values
+        metrics = {}
+        for metric, old in self.metrics.items():
+            metrics[metric] = np.full((len(districts), len(years)), np.nan)
+            metrics[metric][:n_old, old_rows] = old
+
+        rows = [districts.index(d) for d in frames]
+        values[rows] = _stack(frames, years)
+        for metric, fresh in derive(values[rows], years).items():
+            metrics[metric][rows] = fresh
+        return StateCube(districts, years, values, metrics, version)
+
+    def year_pos(self, year):
+        pos = int(np.searchsorted(self.years, year))
+        if pos == len(self.years) or self.years[pos] != year:
+            raise KeyError(year)
+        return pos
+
+    def year_table(self, year):
+        """All metrics for one year, one row per district (NaN where a district lacks the year)."""
+        pos = self.year_pos(year)
+        return pd.DataFrame({METRICS[m]: self.metrics[m][:, pos] for m in METRICS}, index=self.districts)
+
+    def ranking(self, metric, year):
+        """(districts, values) for one metric and year, highest first, missing districts dropped."""
+        values = self.metrics[metric][:, self.year_pos(year)]
+        order = np.argsort(-values, kind="stable")
+        order = order[~np.isnan(values[order])]
+        return [self.districts[i] for i in order], values[order]
+
+
+# === Comparison view ===
+def render_comparison(cube, state, district):
+    st.markdown(f"## 🗺️ {state} — District Comparison")
+    col1, col2 = st.columns(2)
+    year = col1.selectbox("Year", list(cube.years[::-1]), key="compare_year")
+    metric = col2.selectbox("Variable", list(METRICS), format_func=METRICS.get, key="compare_metric")
+
+    districts, values = cube.ranking(metric, year)
+    if not districts:
+        st.info(f"No district has {METRICS[metric].lower()} data for {year}.")
+        return
+    fig = figure_cache.get(f"compare:{metric}:{district}", (state, cube.version), year,
+                           lambda: figures.district_ranking(districts, values, METRICS[metric], year, district))
+    st.plotly_chart(fig, use_container_width=True)
+
+    fig = figure_cache.get(f"compare_trend:{metric}:{district}", (state, cube.version), None,
+                           lambda: figures.district_trends(cube.districts, cube.years, cube.metrics[metric],
+                                                           METRICS[metric], district))
+    st.plotly_chart(fig, use_container_width=True)
+
+    table = cube.year_table(year).loc[districts]
+    table.insert(0, "Rank", np.arange(1, len(districts) + 1))
+    st.dataframe(table.style.format(precision=2), use_container_width=True)
@@ -0,0 +1,179 @@
+# === Daily records ===
+# Upstream feeds deliver daily gridded values in long format, one row per
+# (location_name, date, variable, value) with an optional state column:
+#
+#     python daily.py rain_2024.csv temp_2024.parquet --state Assam
+#
+# Files are streamed in chunks of DAILY_CHUNK_ROWS and each chunk is split into
+# staged parts per district-year, so memory stays bounded by one chunk. Once the
+# stream ends, each touched district-year is merged into its raw partition
+# (DAILY_DIR/<state>/<district>/<year>.feather; a re-sent day replaces the old one)
+# and rolled up to the monthly {prefix}_{month} columns, one partition at a time.
+# Only complete June–December months are rolled up (rainfall and ET₀ are summed,
+# the other variables averaged). The rollup is ingested as partial rows, so the
+# dashboard picks it up like any ingest while yield still comes from the source.
+import argparse
+import os
+import shutil
+import uuid
+
+import pandas as pd
+
+from data_store import atomic_path
+from ingest import INGEST_DIR, SchemaError, delta_file, ingest
+from stats import MONTH_NUMS, VAR_PREFIX_MAP
+
+DAILY_DIR = os.environ.get("DASHBOARD_DAILY_DIR", "daily")
+DAILY_CHUNK_ROWS = int(os.environ.get("DAILY_CHUNK_ROWS", "200000"))
+DAILY_COLUMNS = ["location_name", "date", "variable", "value"]
+SUMMED = {"precip_flux", "et0"}  # monthly totals; the other variables are monthly means
+STAGING = ".staging"
+
+
+def read_chunks(path, chunk_rows=DAILY_CHUNK_ROWS):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+    elif ext == ".parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        raise SchemaError(f"{path}: unsupported file type {ext!r} (expected .csv or .parquet)")
+
+
+def validate_chunk(chunk, state):
+    """Check one chunk of daily records; returns (state, location_name, date, variable, value) rows."""
+    missing = [c for c in DAILY_COLUMNS if c not in chunk.columns]
+    if missing:
+        raise SchemaError(f"missing columns: {', '.join(missing)}")
+    unknown = sorted(set(chunk["variable"].astype(str)) - set(VAR_PREFIX_MAP))
+    if unknown:
+        raise SchemaError(f"unknown variables: {', '.join(unknown)} (expected one of {', '.join(VAR_PREFIX_MAP)})")
+
+    rows = pd.DataFrame({
+        "state": chunk["state"].fillna(state).astype(str) if "state" in chunk else state,
+        "location_name": chunk["location_name"].astype(str),
+        "date": pd.to_datetime(chunk["date"], errors="coerce"),
+        "variable": chunk["variable"].astype(str),
+        "value": pd.to_numeric(chunk["value"], errors="coerce"),
+    })
+    bad = rows["date"].isna()
+    if bad.any():
+        raise SchemaError(f"date: unparseable values in rows {list(chunk.index[bad][:5])}")
+    bad = rows["value"].isna() & chunk["value"].notna()
+    if bad.any():
+        raise SchemaError(f"value: non-numeric values in rows {list(chunk.index[bad][:5])}")
+    # An empty value is a missing day; it leaves its month incomplete
+    return rows[rows["value"].notna()]
+
+
+def partition_path(root, state, district, year):
+    return os.path.join(root, os.path.splitext(delta_file(state, district))[0], f"{year}.feather")
+
+
+def read_daily(state, district, year, root=DAILY_DIR):
+    """One district-year of daily records (date, variable, value), or None when there are none."""
+    path = partition_path(root, state, district, year)
+    return pd.read_feather(path) if os.path.exists(path) else None
+
+
+def daily_years(state, district, root=DAILY_DIR):
+    """Years with stored daily records for a district, including a season still in progress."""
+    directory = os.path.dirname(partition_path(root, state, district, 0))
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return []
+    return sorted(int(stem) for stem, ext in map(os.path.splitext, names) if ext == ".feather" and stem.isdigit())
+
+
+def partition_version(state, district, year, root=DAILY_DIR):
+    try:
+        return os.stat(partition_path(root, state, district, year)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def monthly_rollup(daily):
+    """{prefix}_{month} values of one district-year, for the months with a value on every day."""
+    daily = daily[daily["date"].dt.month.isin([int(m) for m in MONTH_NUMS])]
+    grouped = daily.groupby(["variable", daily["date"].dt.month.rename("month")])
+    counts = grouped["value"].count()
+    complete = counts == grouped["date"].first().dt.days_in_month
+    totals, means = grouped["value"].sum(), grouped["value"].mean()
+    values = means.where([variable not in SUMMED for variable, _ in means.index], totals)
+    return {f"{variable}_{month}": value for (variable, month), value in values[complete].items()}
+
+
+def _merge_partition(root, staging, key):
+    parts_dir = os.path.splitext(partition_path(staging, *key))[0]
+    parts = [pd.read_feather(os.path.join(parts_dir, name)) for name in sorted(os.listdir(parts_dir))]
+    stored = read_daily(*key, root=root)
+    daily = pd.concat(([stored] if stored is not None else []) + parts, ignore_index=True)
+    daily = daily.drop_duplicates(["date", "variable"], keep="last")
+    daily = daily.sort_values(["variable", "date"], kind="stable").reset_index(drop=True)
+
+    path = partition_path(root, *key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with atomic_path(path) as tmp:
+        daily.to_feather(tmp, compression="uncompressed")
+    return daily
+
+
+def ingest_daily(paths, state, root=DAILY_DIR, ingest_root=INGEST_DIR, chunk_rows=DAILY_CHUNK_ROWS):
+    """Store daily files as raw partitions and ingest their monthly rollup.
+
+    Returns {(state, district, year): months rolled up}. A schema error in any chunk
+    aborts the run before a partition or the monthly data is touched.
+    """
+    staging = os.path.join(root, STAGING, uuid.uuid4().hex)
+    touched, rollups = set(), []
+    try:
+        for path in paths:
+            for chunk in read_chunks(path, chunk_rows):
+                chunk = validate_chunk(chunk, state)
+                year = chunk["date"].dt.year.rename("year")
+                for (row_state, district, row_year), group in chunk.groupby(["state", "location_name", year], sort=False):
+                    key = (row_state, district, int(row_year))
+                    parts_dir = os.path.splitext(partition_path(staging, *key))[0]
+                    os.makedirs(parts_dir, exist_ok=True)
+                    part = os.path.join(parts_dir, f"{len(os.listdir(parts_dir)):06d}.feather")
+                    group[["date", "variable", "value"]].reset_index(drop=True).to_feather(part)
+                    touched.add(key)
+
+        results = {}
+        for key in sorted(touched):
+            values = monthly_rollup(_merge_partition(root, staging, key))
+            results[key] = len({column.rsplit("_", 1)[1] for column in values})
+            if values:
+                rollups.append({"state": key[0], "location_name": key[1], "year": key[2], **values})
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    if rollups:
+        os.makedirs(ingest_root, exist_ok=True)
+        ingest(pd.DataFrame(rollups), state, ingest_root, partial=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Store daily records and roll them up into the monthly data.")
+    parser.add_argument("files", nargs="+", help="CSV or Parquet files of long-format daily records")
+    parser.add_argument("--state", default=os.environ.get("DASHBOARD_DEFAULT_STATE", "Assam"),
+                        help="State for rows without a 'state' column")
+    parser.add_argument("--root", default=DAILY_DIR)
+    parser.add_argument("--ingest-root", default=INGEST_DIR)
+    parser.add_argument("--chunk-rows", type=int, default=DAILY_CHUNK_ROWS)
+    args = parser.parse_args(argv)
+
+    try:
+        results = ingest_daily(args.files, args.state, args.root, args.ingest_root, args.chunk_rows)
+    except SchemaError as e:
+        parser.exit(1, f"{e}\n")
+    for (state, district, year), months in results.items():
+        print(f"{state} / {district} / {year}: daily records stored, {months} complete month(s) rolled up")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+# === Columnar cache for the district workbook ===
+# Parsing all district sheets through openpyxl takes seconds per process, so the
+# workbook is converted once into uncompressed Feather (Arrow IPC) files that can
+# be memory-mapped on load. The store is rebuilt only when the workbook changes.
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+WORKBOOK = "Final_version_Monthly_District_Data.xlsx"
+CACHE_DIR = os.environ.get("DASHBOARD_CACHE_DIR", ".data_cache")
+MANIFEST = "manifest.json"
+STORE_FORMAT = 1
+
+
+@contextmanager
+def atomic_path(path, suffix=".tmp"):
+    """A temporary path next to path that replaces it once the block completes.
+
+    Readers only ever see the old file or the complete new one; a failed write
+    leaves path untouched and removes the temporary file.
+    """
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}{suffix}"
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def write_atomic(path, data, mode="wb"):
+    with atomic_path(path) as tmp, open(tmp, mode) as f:
+        f.write(data)
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_dir(path):
+    # Same-named workbooks in different state folders must not share a store
+    name = os.path.splitext(os.path.basename(path))[0]
+    tag = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]
+    return os.path.join(CACHE_DIR, f"{name}-{tag}")
+
+
+def read_manifest(store):
+    try:
+        with open(os.path.join(store, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("format") == STORE_FORMAT else None
+
+
+def write_manifest(store, manifest):
+    # Written last and atomically, so a half-built store is never picked up
+    write_atomic(os.path.join(store, MANIFEST), json.dumps(manifest, indent=1), "w")
+
+
+def stat_matches(path, manifest):
+    stat = os.stat(path)
+    return manifest["mtime_ns"] == stat.st_mtime_ns and manifest["size"] == stat.st_size
+
+
+def check_fresh(path, manifest):
+    """Return (is_fresh, sha256) — the hash is only computed when the mtime moved."""
+    if manifest is None:
+        return False, None
+    if stat_matches(path, manifest):
+        return True, manifest["sha256"]
+    digest = file_sha256(path)
+    return digest == manifest["sha256"], digest
+
+
+def remember_mtime(path, store, manifest):
+    # Touched but unchanged — remember the new mtime so we skip hashing next time
+    if not stat_matches(path, manifest):
+        stat = os.stat(path)
+        manifest["mtime_ns"], manifest["size"] = stat.st_mtime_ns, stat.st_size
+        write_manifest(store, manifest)
+
+
+def parse_workbook(path):
+    xls = pd.ExcelFile(path)
+    return {sheet: xls.parse(sheet).dropna() for sheet in xls.sheet_names}
+
+
+def workbook_sheets(path):
+    """Sheet names only: from the store manifest when current, else the workbook's own index."""
+    manifest = read_manifest(store_dir(path))
+    if manifest is not None and stat_matches(path, manifest):
+        return [entry["name"] for entry in manifest["sheets"]]
+    from openpyxl import load_workbook
+    # read_only only parses workbook.xml here, not the sheet contents
+    wb = load_workbook(path, read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+def build_store(path, digest=None):
+    frames = parse_workbook(path)
+    store = store_dir(path)
+    os.makedirs(store, exist_ok=True)
+
+    sheets = []
+    for i, (sheet, frame) in enumerate(frames.items()):
+        file_name = f"{i:04d}.feather"
+        with atomic_path(os.path.join(store, file_name)) as tmp:
+            frame.reset_index(drop=True).to_feather(tmp, compression="uncompressed")
+        sheets.append({"name": sheet, "file": file_name, "rows": len(frame)})
+
+    stat = os.stat(path)
+    write_manifest(store, {
+        "format": STORE_FORMAT,
+        "source": os.path.basename(path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": digest or file_sha256(path),
+        "sheets": sheets,
+    })
+    return frames
+
+
+# === Year-indexed district frames ===
+class YearIndex:
+    """Dense year -> row lookup over a frame sorted by year."""
+
+    def __init__(self, years):
+        self.years = np.asarray(years)
+        self.first_year = int(self.years[0])
+        self.last_year = int(self.years[-1])
+        self.rows = np.full(self.last_year - self.first_year + 1, -1)
+        self.rows[self.years - self.first_year] = np.arange(len(self.years))
+
+    def __contains__(self, year):
+        offset = int(year) - self.first_year
+        return 0 <= offset < len(self.rows) and self.rows[offset] >= 0
+
+    def position(self, year):
+        if year not in self:
+            raise KeyError(year)
+        return int(self.rows[int(year) - self.first_year])
+
+    def span(self, start, stop):
+        """Row slice covering years start..stop inclusive."""
+        lo = np.searchsorted(self.years, start, side="left")
+        hi = np.searchsorted(self.years, stop, side="right")
+        return slice(int(lo), int(hi))
+
+    def row(self, frame, year):
+        pos = self.position(year)
+        return frame.iloc[pos:pos + 1]
+
+    def window(self, frame, start, stop):
+        return frame.iloc[self.span(start, stop)]
+
+
+def index_by_year(df):
+    if df["year"].is_monotonic_increasing:
+        # Shallow copy: keeps memory-mapped column data shared instead of copying it
+        df = df.copy(deep=False)
+    else:
+        df = df.sort_values("year", kind="stable")
+    df.index = df["year"].to_numpy()
+    return df
+
+
+def load_indexed(path=WORKBOOK):
+    """Year-indexed district frames plus their YearIndex lookups."""
+    frames = {district: index_by_year(df) for district, df in load_districts(path).items()}
+    return frames, {district: YearIndex(df.index) for district, df in frames.items()}
+
+
+def read_sheet(store, entry):
+    from pyarrow import feather
+    table = feather.read_table(os.path.join(store, entry["file"]), memory_map=True)
+    return table.to_pandas()
+
+
+def load_districts(path):
+    """Load every district sheet, from the columnar store when it is up to date."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        # No Arrow available: fall back to parsing the workbook directly
+        return parse_workbook(path)
+
+    store = store_dir(path)
+    manifest = read_manifest(store)
+    fresh, digest = check_fresh(path, manifest)
+    if not fresh:
+        return build_store(path, digest)
+
+    remember_mtime(path, store, manifest)
+    try:
+        return {entry["name"]: read_sheet(store, entry) for entry in manifest["sheets"]}
+    except (OSError, ValueError):
+        return build_store(path, digest)
+
+
+def load_sheet(path, name):
+    """Load one district sheet; the store is built for the whole workbook on first use."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return pd.read_excel(path, sheet_name=name).dropna()
+
+    store = store_dir(path)
+    manifest = read_manifest(store)
+    fresh, digest = check_fresh(path, manifest)
+    if not fresh:
+        return build_store(path, digest)[name]
+
+    remember_mtime(path, store, manifest)
+    entry = next((e for e in manifest["sheets"] if e["name"] == name), None)
+    if entry is None:
+        raise KeyError(name)
+    try:
+        return read_sheet(store, entry)
+    except (OSError, ValueError):
+        return build_store(path, digest)[name]
@@ -0,0 +1,429 @@
+# === Figure factory ===
+# Every chart on the dashboard is built by one function here, and served through a
+# process-wide LRU of serialized figure JSON keyed on (district data key, year, chart id).
+# A cache hit skips both the pandas work and Plotly's property validation.
+# Long line series are thinned with LTTB to FIGURE_MAX_POINTS per trace, and a figure
+# holding more than FIGURE_WEBGL_POINTS points is drawn with Scattergl; numpy arrays
+# go to the browser binary-encoded.
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from instrumentation import phase_plotly
+from singleflight import SingleFlight
+from stats import MONTH_NUMS, MONTHS, VAR_PREFIX_MAP
+
+FIGURE_CACHE_MB = float(os.environ.get("FIGURE_CACHE_MB", "64"))
+MAX_TRACE_POINTS = int(os.environ.get("FIGURE_MAX_POINTS", "1500"))
+WEBGL_POINTS = int(os.environ.get("FIGURE_WEBGL_POINTS", "2000"))
+MARKER_POINTS = 200
+
+
+class FigureCache:
+    """LRU of figure JSON strings, bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+        self.flights = SingleFlight()
+
+    def get(self, chart_id, data_key, year, build):
+        key = (data_key, year, chart_id)
+        with self.lock:
+            spec = self.entries.get(key)
+            if spec is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+        if spec is None:
+            # Sessions missing the same figure at once wait for one build instead of each making it
+            spec = self.flights.do(key, lambda: self._build(key, build))
+        # Already validated when it was built, so rebuild the Figure without re-checking
+        with phase_plotly():
+            return go.Figure(json.loads(spec), _validate=False)
+
+    def _build(self, key, build):
+        # The builders time their own figure construction, apart from their data prep
+        fig = build()
+        with phase_plotly():
+            spec = pio.to_json(fig, validate=False)
+        self.put(key, spec)
+        return spec
+
+    def put(self, key, spec):
+        with self.lock:
+            self.misses += 1
+            self._insert(key, spec)
+
+    def preload(self, data_key, specs):
+        """Seed the cache with pre-rendered (chart id, year, spec) entries, e.g. from a snapshot bundle."""
+        with self.lock:
+            for chart_id, year, spec in specs:
+                if (data_key, year, chart_id) not in self.entries:
+                    self._insert((data_key, year, chart_id), spec)
+
+    def _insert(self, key, spec):
+        if key in self.entries:
+            self.size -= len(self.entries.pop(key))
+        if len(spec) > self.max_bytes:
+            return
+        self.entries[key] = spec
+        self.size += len(spec)
+        while self.size > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.size -= len(evicted)
+
+    def specs(self, data_key):
+        """(chart id, year, spec) of every cached figure of one district's data."""
+        with self.lock:
+            return [(chart_id, year, spec) for (key, year, chart_id), spec in self.entries.items() if key == data_key]
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+
+
+figure_cache = FigureCache(int(FIGURE_CACHE_MB * 2**20))
+
+
+def present_cols(df, prefix):
+    return [f"{prefix}_{m}" for m in MONTH_NUMS if f"{prefix}_{m}" in df.columns]
+
+
+# === Long series: LTTB downsampling and WebGL ===
+def lttb(x, y, n):
+    """Indices of n points of (x, y) chosen by Largest-Triangle-Three-Buckets.
+
+    The first and last points are always kept; in between, each of n - 2 buckets
+    keeps the point forming the largest triangle with the point kept before it and
+    the mean of the next bucket, which preserves peaks and troughs.
+    """
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    edges = np.linspace(1, size - 1, n - 1).astype(int)
+    lo, hi = edges[:-1], edges[1:]
+    next_lo, next_hi = np.append(lo[1:], size - 1), np.append(hi[1:], size)
+    cx, cy = np.concatenate([[0.0], np.cumsum(x)]), np.concatenate([[0.0], np.cumsum(y)])
+    avg_x = (cx[next_hi] - cx[next_lo]) / (next_hi - next_lo)
+    avg_y = (cy[next_hi] - cy[next_lo]) / (next_hi - next_lo)
+
+    picked = np.empty(n, dtype=int)
+    picked[0], picked[-1] = 0, size - 1
+    a = 0
+    for i in range(n - 2):
+        bx, by = x[lo[i]:hi[i]], y[lo[i]:hi[i]]
+        area = np.abs((x[a] - avg_x[i]) * (by - y[a]) - (x[a] - bx) * (avg_y[i] - y[a]))
+        a = lo[i] + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
+
+def downsample(x, y, max_points=MAX_TRACE_POINTS):
+    """(x, y) as numpy arrays, thinned to max_points with LTTB (gaps are dropped when thinning)."""
+    x, y = np.asarray(x), np.asarray(y, dtype=float)
+    if len(x) <= max_points:
+        return x, y
+    keep = np.isfinite(y)
+    x, y = x[keep], y[keep]
+    numeric_x = x.astype("datetime64[s]").astype(float) if x.dtype.kind == "M" else x
+    picked = lttb(numeric_x, y, max_points)
+    return x[picked], y[picked]
+
+
+def scatter_type(points):
+    return go.Scattergl if points > WEBGL_POINTS else go.Scatter
+
+
+def line_traces(series, max_points=MAX_TRACE_POINTS):
+    """Line traces for [(x, y, trace kwargs)], downsampled per trace and switched to
+    Scattergl when the figure would hold more than WEBGL_POINTS points."""
+    series = [(*downsample(x, y, max_points), kwargs) for x, y, kwargs in series]
+    trace = scatter_type(sum(len(x) for x, _, _ in series))
+    traces = []
+    for x, y, kwargs in series:
+        if len(x) > MARKER_POINTS and "mode" in kwargs:
+            kwargs = dict(kwargs, mode=kwargs["mode"].replace("+markers", ""))
+        with phase_plotly():
+            traces.append(trace(x=x, y=y, **kwargs))
+    return traces
+
+
+# === Section 3: Line Plot for All Variables ===
+def climate_trend(df_year, district, year):
+    current_yield = df_year['yield'].values[0]
+    series = []
+    for prefix, label in VAR_PREFIX_MAP.items():
+        cols = present_cols(df_year, prefix)
+        if not cols: continue
+        series.append((label, df_year[cols].values.flatten()))
+
+    with phase_plotly():
+        fig = go.Figure()
+        for label, values in series:
+            fig.add_trace(go.Scatter(x=MONTHS[:len(values)], y=values, mode="lines+markers", name=label))
+
+        fig.add_trace(go.Scatter(
+            x=MONTHS, y=[current_yield]*len(MONTHS),
+            mode="lines", name=f"Yield: {current_yield:.2f} tons/ha",
+            line=dict(dash='dash', color='green'), yaxis='y2'
+        ))
+
+        fig.update_layout(
+            title=f"📉 Climate Variables Trend (June–Dec) – {district}, {year}",
+            xaxis_title="Month",
+            yaxis=dict(title="Climate Value"),
+            yaxis2=dict(title="Yield (tons/ha)", overlaying='y', side='right', showgrid=False, tickfont=dict(color="green")),
+            legend=dict(orientation="v"), height=600
+        )
+    return fig
+
+
+# === Section 4: Rainfall Pie Chart + Share Trend ===
+def season_pie(district_stats, year):
+    current_percent = district_stats.season_share(year)
+    labels = list(current_percent.keys())
+    values = [round(v, 1) for v in current_percent.values()]
+    with phase_plotly():
+        fig = go.Figure(data=[go.Pie(
+            labels=labels, values=values,
+            textinfo="label+percent",
+            marker=dict(colors=['#0074D9', '#2ECC40'])
+        )])
+        fig.update_layout(title="💧 Rainfall Season-wise Share")
+    return fig
+
+
+def share_trend(district_stats):
+    years_all, share_series = district_stats.share_trend()
+    traces = line_traces([
+        (years_all, share_series["Monsoon"], dict(name="Monsoon %", mode="lines+markers", line=dict(color='blue'))),
+        (years_all, share_series["Post-monsoon"], dict(name="Post-monsoon %", mode="lines+markers", line=dict(color='green'))),
+    ])
+    with phase_plotly():
+        fig = go.Figure(traces)
+        fig.update_layout(title="🌧️ Monsoon vs Post-monsoon % Trend", xaxis_title="Year", yaxis_title="Percent of Seasonal Rainfall", height=400)
+    return fig
+
+
+# === Section 5: Yield vs District Avg (Baseline) ===
+def yield_baseline(df_year, district_stats):
+    current_yield = df_year['yield'].values[0]
+    with phase_plotly():
+        fig = go.Figure()
+        fig.add_trace(go.Bar(x=["Your Yield"], y=[current_yield], name="Your Yield", marker_color="green"))
+        fig.add_trace(go.Bar(x=["District Avg (2015–2019)"], y=[district_stats.baseline['yield']], name="District Avg", marker_color="gray"))
+        fig.update_layout(barmode="group", yaxis_title="tons/ha", title="📈 Your Yield vs District Baseline Avg", height=400)
+    return fig
+
+
+# === Section 7 / 11 / 12: Monthly Value vs Baseline Line Plots ===
+def monthly_vs_baseline(df_year, district_stats, year, prefix, name, color, title, yaxis_title):
+    cols = present_cols(df_year, prefix)
+    current, baseline = df_year[cols].values.flatten(), district_stats.baseline_mean(cols)
+    with phase_plotly():
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=MONTHS, y=current, name=f"{year} {name}", mode="lines+markers", line=dict(color=color)))
+        fig.add_trace(go.Scatter(x=MONTHS, y=baseline, name="2015–2019 Avg", mode="lines+markers", line=dict(color="gray", dash="dot")))
+        fig.update_layout(title=title, xaxis_title="Month", yaxis_title=yaxis_title, height=400)
+    return fig
+
+
+def temperature(df_year, district_stats, year):
+    return monthly_vs_baseline(df_year, district_stats, year, "temp", "Temperature", "red",
+                               "🌡️ Monthly Temperature Comparison", "Temperature (°C)")
+
+
+def min_temperature(df_year, district_stats, year):
+    return monthly_vs_baseline(df_year, district_stats, year, "tmin", "Min Temp", "blue",
+                               "❄️ Monthly Min Temperature Comparison", "Min Temp (°C)")
+
+
+def max_temperature(df_year, district_stats, year):
+    return monthly_vs_baseline(df_year, district_stats, year, "tmax", "Max Temp", "orange",
+                               "🔥 Monthly Max Temperature Comparison", "Max Temp (°C)")
+
+
+# === Section 8: Accumulated Rainfall Line Plot ===
+def accumulated_rain(df_year, district_stats):
+    cols = present_cols(df_year, "precip_flux")
+    curr_rain = df_year[cols].values.flatten()
+    avg_rain = district_stats.baseline_mean(cols)
+    curr_cumulative, avg_cumulative = pd.Series(curr_rain).cumsum(), pd.Series(avg_rain).cumsum()
+    with phase_plotly():
+        fig = go.Figure()
+        fig.add_trace(go.Scatter(x=MONTHS, y=curr_cumulative, mode="lines+markers", name="Current Year"))
+        fig.add_trace(go.Scatter(x=MONTHS, y=avg_cumulative, mode="lines+markers", name="2015–2019 Avg", line=dict(dash="dash")))
+        fig.update_layout(title="🌧️ Accumulated Rainfall (June–Dec)", xaxis_title="Month", yaxis_title="Cumulative Rainfall (mm)", height=400)
+    return fig
+
+
+# === Section 8b: Daily Rainfall Drill-down ===
+def daily_rainfall(daily, year, month):
+    rain = daily[(daily["variable"] == "precip_flux") & (daily["date"].dt.month == month)]
+    dates, values = rain["date"].to_numpy(), rain["value"].to_numpy()
+    cumulative, total = values.cumsum(), values.sum()
+    month_start = pd.Timestamp(year=year, month=month, day=1)
+    with phase_plotly():
+        fig = go.Figure()
+        fig.add_bar(x=dates, y=values, name="Daily rainfall", marker_color="steelblue")
+        fig.add_trace(go.Scatter(x=dates, y=cumulative, mode="lines", name=f"Month total: {total:.1f} mm",
+                                 line=dict(color="navy"), yaxis="y2"))
+        fig.update_layout(
+            title=f"🌦️ Daily Rainfall – {month_start:%B %Y}",
+            xaxis_title="Date",
+            yaxis=dict(title="Rainfall (mm)"),
+            yaxis2=dict(title="Cumulative (mm)", overlaying="y", side="right", showgrid=False),
+            legend=dict(orientation="h"), height=400
+        )
+    return fig
+
+
+# === Section 9: Seasonal Rainfall Bar + Bullet Chart ===
+def seasonal_averages(district_stats):
+    monsoon_avg = district_stats.baseline_mean([f"precip_flux_{m}" for m in ['6', '7', '8', '9']]).sum()
+    post_avg = district_stats.baseline_mean([f"precip_flux_{m}" for m in ['10', '11']]).sum()
+    return monsoon_avg, post_avg
+
+
+def season_bar(district_stats, year):
+    season_totals = district_stats.season_totals(year)
+    monsoon_sum, post_sum = season_totals["Monsoon"], season_totals["Post-monsoon"]
+    monsoon_avg, post_avg = seasonal_averages(district_stats)
+    with phase_plotly():
+        fig = go.Figure()
+        fig.add_bar(x=["Monsoon"], y=[monsoon_sum], name=f"{year} Monsoon", marker_color="blue")
+        fig.add_bar(x=["Monsoon"], y=[monsoon_avg], name="Avg (2015–2019)", marker_color="lightblue")
+        fig.add_bar(x=["Post-monsoon"], y=[post_sum], name=f"{year} Post-monsoon", marker_color="green")
+        fig.add_bar(x=["Post-monsoon"], y=[post_avg], name="Avg (2015–2019)", marker_color="lightgreen")
+        fig.update_layout(barmode="group", title="📊 Total Rainfall per Season", yaxis_title="Rainfall (mm)", height=400)
+    return fig
+
+
+def monsoon_bullet(district_stats, year):
+    monsoon_sum = district_stats.season_totals(year)["Monsoon"]
+    monsoon_avg, _ = seasonal_averages(district_stats)
+    with phase_plotly():
+        fig = go.Figure()
+        fig.add_trace(go.Indicator(
+            mode = "number+gauge+delta",
+            value = monsoon_sum,
+            domain = {'x': [0.1, 1], 'y': [0, 1]},
+            title = {'text': "Monsoon Rainfall vs Avg (mm)"},
+            delta = {'reference': monsoon_avg},
+            gauge = {
+                'shape': "bullet",
+                'axis': {'range': [None, max(monsoon_sum, monsoon_avg) + 200]},
+                'threshold': {
+                    'line': {'color': "red", 'width': 2},
+                    'thickness': 0.75,
+                    'value': monsoon_avg
+                },
+                'bar': {'color': "blue"}
+            }
+        ))
+        fig.update_layout(height=200)
+    return fig
+
+
+# === Section 10: Climate Comparison Bar Plots ===
+def climate_bar(df_year, district_stats, district, year, prefix):
+    cols = present_cols(df_year, prefix)
+    avg_vals = [district_stats.baseline[c] for c in cols]
+    current_vals = [df_year[c].values[0] for c in cols]
+
+    with phase_plotly():
+        fig = go.Figure()
+        fig.add_bar(x=MONTHS, y=avg_vals, name="2015–2019 Avg", marker_color='gray')
+        fig.add_bar(x=MONTHS, y=current_vals, name=f"{year}", marker_color='orange')
+
+        fig.update_layout(
+            barmode="group",
+            title=f"{VAR_PREFIX_MAP[prefix]} – {district}",
+            xaxis_title="Month",
+            yaxis_title=VAR_PREFIX_MAP[prefix],
+            height=400,
+            legend=dict(orientation="h")
+        )
+    return fig
+
+
+# === Section 5b: Predicted vs Actual Yield ===
+def yield_prediction(rows, district):
+    observed, forecast = rows[rows["actual"].notna()], rows[rows["actual"].isna()]
+    traces = line_traces([
+        (observed["year"], observed["actual"], dict(name="Actual", mode="lines+markers", line=dict(color="green"))),
+        (observed["year"], observed["predicted"], dict(name="Predicted (year held out)", mode="lines+markers",
+                                                       line=dict(color="gray", dash="dot"))),
+    ])
+    forecast_x, forecast_y = forecast["year"].to_numpy(), forecast["predicted"].to_numpy()
+    with phase_plotly():
+        fig = go.Figure(traces)
+        if len(forecast):
+            fig.add_trace(go.Scatter(x=forecast_x, y=forecast_y, mode="markers",
+                                     name="Forecast", marker=dict(color="orange", size=12, symbol="diamond")))
+        fig.update_layout(title=f"🤖 Predicted vs Actual Yield – {district}", xaxis_title="Year",
+                          yaxis_title="tons/ha", height=400)
+    return fig
+
+
+# === District comparison: ranking bar chart ===
+def district_ranking(districts, values, label, year, highlight=None):
+    colors = ["orange" if d == highlight else "steelblue" for d in districts]
+    with phase_plotly():
+        fig = go.Figure(go.Bar(x=values, y=districts, orientation="h", marker_color=colors))
+        fig.update_layout(
+            title=f"🏆 {label} – {year}",
+            xaxis_title=label,
+            yaxis=dict(autorange="reversed"),
+            height=max(400, 24 * len(districts) + 120),
+        )
+    return fig
+
+
+# === District comparison: every district's series over the years ===
+def district_trends(districts, years, values, label, highlight=None):
+    """All districts in grey behind the state median and the highlighted district.
+
+    Up to MAX_TRACE_POINTS * 4 points the other districts share one NaN-separated
+    float32 trace without hover; above that they become a 10th–90th percentile band,
+    so the payload stays bounded however many districts a state has.
+    """
+    others = values[[i for i, d in enumerate(districts) if d != highlight]]
+    band = others.size > MAX_TRACE_POINTS * 4
+    if not band:
+        gap = np.full((len(others), 1), np.nan, dtype=np.float32)
+        background_x = np.hstack([np.broadcast_to(years.astype(np.float32), others.shape), gap]).ravel()
+        background_y = np.hstack([others.astype(np.float32), gap]).ravel()
+        trace = scatter_type(len(background_y))
+    else:
+        trace = scatter_type(len(years) * 4)
+        low, high = np.nanpercentile(others, [10, 90], axis=0)
+    median = np.nanmedian(values, axis=0)
+
+    with phase_plotly():
+        fig = go.Figure()
+        if not band:
+            fig.add_trace(trace(x=background_x, y=background_y, mode="lines", name="Other districts",
+                                line=dict(color="lightgray", width=1), hoverinfo="skip"))
+        else:
+            fig.add_trace(trace(x=years, y=low, mode="lines", line=dict(width=0), showlegend=False, hoverinfo="skip"))
+            fig.add_trace(trace(x=years, y=high, mode="lines", line=dict(width=0), fill="tonexty",
+                                fillcolor="rgba(160, 160, 160, 0.3)", name="10th–90th percentile"))
+        fig.add_trace(trace(x=years, y=median, mode="lines", name="State median",
+                            line=dict(color="gray", dash="dash")))
+        if highlight in districts:
+            fig.add_trace(trace(x=years, y=values[districts.index(highlight)], mode="lines+markers",
+                                name=highlight, line=dict(color="orange", width=3)))
+        fig.update_layout(title=f"📈 {label} – all districts", xaxis_title="Year", yaxis_title=label, height=450)
+    return fig
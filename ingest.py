@@ -0,0 +1,189 @@
+# === Incremental ingestion ===
+# New district-year rows (CSV, Parquet or Feather) are validated against the
+# dashboard's column schema and upserted into per-district delta files, without
+# touching the source workbooks:
+#
+#     python ingest.py kharif_2024.csv --state Assam
+#
+# Deltas live in INGEST_DIR/<state>/<district>.feather next to a manifest whose
+# version goes up on every ingest. The catalog overlays a district's delta on its
+# source rows (same year: the ingested row wins), and running sessions notice the
+# new manifest on their next rerun and reload only the districts that changed.
+import argparse
+import json
+import os
+import re
+
+import pandas as pd
+
+from data_store import atomic_path, write_atomic
+from stats import MONTH_NUMS, VAR_PREFIX_MAP
+
+INGEST_DIR = os.environ.get("DASHBOARD_INGEST_DIR", "ingested")
+INGEST_MANIFEST = "manifest.json"
+KEY_COLUMNS = ["year", "location_name"]
+VALUE_COLUMNS = ["yield"] + [f"{prefix}_{m}" for prefix in VAR_PREFIX_MAP for m in MONTH_NUMS]
+OPTIONAL_COLUMNS = ["latitude", "longitude", "state"]
+MONTHLY_COLUMN = re.compile(r"^(.+)_(\d+)$")
+
+
+class SchemaError(ValueError):
+    pass
+
+
+def read_rows(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return pd.read_csv(path)
+    if ext == ".parquet":
+        return pd.read_parquet(path)
+    if ext == ".feather":
+        return pd.read_feather(path)
+    raise SchemaError(f"{path}: unsupported file type {ext!r} (expected .csv, .parquet or .feather)")
+
+
+def validate(rows, partial=False):
+    """Check rows against the {prefix}_{month} schema and return them with normalized dtypes.
+
+    With partial=True rows may carry only some value columns, or leave values empty;
+    upsert() then keeps the existing values of those columns.
+    """
+    problems = []
+    required = KEY_COLUMNS if partial else KEY_COLUMNS + VALUE_COLUMNS
+    missing = [c for c in required if c not in rows.columns]
+    if missing:
+        problems.append(f"missing columns: {', '.join(missing)}")
+    known = set(KEY_COLUMNS + VALUE_COLUMNS + OPTIONAL_COLUMNS)
+    unknown = [c for c in rows.columns if c not in known]
+    if unknown:
+        hint = [c for c in unknown if MONTHLY_COLUMN.match(str(c))]
+        problems.append(f"unexpected columns: {', '.join(map(str, unknown))}"
+                        + (f" (monthly columns must be one of {', '.join(VAR_PREFIX_MAP)} × months "
+                           f"{MONTH_NUMS[0]}–{MONTH_NUMS[-1]})" if hint else ""))
+    if problems:
+        raise SchemaError("; ".join(problems))
+
+    rows = rows.copy()
+    numeric = [c for c in ["year"] + VALUE_COLUMNS + OPTIONAL_COLUMNS[:2] if c in rows.columns]
+    for col in numeric:
+        converted = pd.to_numeric(rows[col], errors="coerce")
+        bad = converted.isna() & rows[col].notna()
+        if bad.any():
+            problems.append(f"{col}: non-numeric values in rows {list(rows.index[bad][:5])}")
+        rows[col] = converted
+    present = [c for c in VALUE_COLUMNS if c in rows.columns]
+    if partial:
+        incomplete = rows[KEY_COLUMNS].isna().any(axis=1) | rows[present].isna().all(axis=1)
+    else:
+        incomplete = rows[KEY_COLUMNS + VALUE_COLUMNS].isna().any(axis=1)
+    if incomplete.any():
+        # The loaders drop rows with gaps, so an incomplete row would vanish silently
+        problems.append(f"missing values in rows {list(rows.index[incomplete][:5])}")
+    if problems:
+        raise SchemaError("; ".join(problems))
+
+    if (rows["year"] % 1 != 0).any():
+        raise SchemaError("year: must be whole numbers")
+    rows["year"] = rows["year"].astype("int64")
+    rows["location_name"] = rows["location_name"].astype(str)
+    duplicated = rows.duplicated([c for c in ("state", "location_name", "year") if c in rows])
+    if duplicated.any():
+        raise SchemaError(f"duplicate district-years in rows {list(rows.index[duplicated][:5])}")
+    return rows
+
+
+def upsert(frame, rows):
+    """frame with rows merged in by year (a row for an existing year replaces it,
+    except for values the new row leaves empty)."""
+    if frame is None or frame.empty:
+        merged = rows
+    else:
+        rows = rows.reindex(columns=frame.columns.union(rows.columns, sort=False))
+        previous = frame.drop_duplicates("year", keep="last").set_index("year")
+        rows = rows.fillna(previous.reindex(rows["year"]).reset_index().set_index(rows.index))
+        for col in ("latitude", "longitude"):
+            # Location is fixed per district; keep it when the new rows leave it out
+            if col in frame:
+                rows[col] = rows[col].fillna(frame[col].iloc[-1])
+        merged = pd.concat([frame, rows], ignore_index=True)
+        merged = merged.drop_duplicates("year", keep="last")
+    return merged.sort_values("year", kind="stable").reset_index(drop=True)
+
+
+# === Delta store ===
+def read_manifest(root=INGEST_DIR):
+    try:
+        with open(os.path.join(root, INGEST_MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"version": 0, "districts": {}}
+
+
+def write_manifest(root, manifest):
+    write_atomic(os.path.join(root, INGEST_MANIFEST), json.dumps(manifest, indent=1), "w")
+
+
+def delta_file(state, district):
+    safe = lambda name: re.sub(r"[^\w.-]+", "_", name)  # noqa: E731
+    return os.path.join(safe(state), f"{safe(district)}.feather")
+
+
+def read_delta(root, entry):
+    return pd.read_feather(os.path.join(root, entry["file"]))
+
+
+def ingest(rows, state, root=INGEST_DIR, partial=False):
+    """Validate rows and upsert them per district; returns {(state, district): rows ingested}.
+
+    Only one ingest should run against a root at a time; readers are safe because
+    every file (and the manifest, last) is replaced atomically.
+    """
+    rows = validate(rows, partial)
+    if "state" in rows:
+        rows["state"] = rows["state"].fillna(state).astype(str)
+    else:
+        rows["state"] = state
+
+    manifest = read_manifest(root)
+    version = manifest["version"] + 1
+    counts = {}
+    for (row_state, district), group in rows.groupby(["state", "location_name"], sort=False):
+        group = group.drop(columns="state")
+        states = manifest["districts"].setdefault(row_state, {})
+        entry = states.get(district)
+        previous = read_delta(root, entry) if entry else None
+        merged = upsert(previous, group)
+
+        file_name = delta_file(row_state, district)
+        path = os.path.join(root, file_name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with atomic_path(path) as tmp:
+            merged.to_feather(tmp, compression="uncompressed")
+        states[district] = {"file": file_name, "rows": len(merged), "version": version}
+        counts[(row_state, district)] = len(group)
+
+    manifest["version"] = version
+    write_manifest(root, manifest)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Append or update district-year rows without a full reload.")
+    parser.add_argument("files", nargs="+", help="CSV, Parquet or Feather files of new rows")
+    parser.add_argument("--state", default=os.environ.get("DASHBOARD_DEFAULT_STATE", "Assam"),
+                        help="State for rows without a 'state' column")
+    parser.add_argument("--root", default=INGEST_DIR)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.root, exist_ok=True)
+    for path in args.files:
+        try:
+            counts = ingest(read_rows(path), args.state, args.root)
+        except SchemaError as e:
+            parser.exit(1, f"{path}: {e}\n")
+        for (state, district), n in counts.items():
+            print(f"{path}: {n} row(s) -> {state} / {district}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+# === Per-section timing and memory instrumentation ===
+# Opt-in profiling of each dashboard section. Turn it on with DASHBOARD_PROFILE=1 or
+# by opening the app with ?debug=1. Each profiled rerun records, per section:
+#   - wall time,
+#   - Plotly time (figure build/serialization and st.plotly_chart) vs. everything else
+#     (the pandas/NumPy work),
+#   - net allocated memory blocks (and the tracemalloc peak when tracing is on).
+# Results show in a sidebar debug panel, can be logged as one JSON line per section
+# (DASHBOARD_PROFILE_LOG=1) and are aggregated process-wide for a Prometheus text
+# endpoint (DASHBOARD_METRICS_PORT=9108; it listens on DASHBOARD_METRICS_HOST, by
+# default 127.0.0.1, so set 0.0.0.0 for a scraper on another host).
+# DASHBOARD_PROFILE_TRACEMALLOC=1 also records per-section peak memory, at a
+# noticeable slowdown.
+#
+# Time to paint is always recorded, profiling or not: the time from the start of a
+# rerun until each section has been sent to the browser, split into the first rerun
+# in a process ("cold", which includes importing the dashboard's modules) and the
+# rest ("warm"). It is exported as dashboard_time_to_paint_seconds;
+# benchmarks/startup.py measures cold starts in fresh processes and profiles import time.
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROFILE_ENABLED = os.environ.get("DASHBOARD_PROFILE") == "1"
+PROFILE_LOG = os.environ.get("DASHBOARD_PROFILE_LOG") == "1"
+PROFILE_TRACEMALLOC = os.environ.get("DASHBOARD_PROFILE_TRACEMALLOC") == "1"
+METRICS_PORT = os.environ.get("DASHBOARD_METRICS_PORT")
+METRICS_HOST = os.environ.get("DASHBOARD_METRICS_HOST", "127.0.0.1")
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+perf_log = logging.getLogger("dashboard.perf")
+_active = threading.local()
+
+
+class SectionRecord:
+    def __init__(self, key):
+        self.key = key
+        self.wall = 0.0
+        self.plotly = 0.0
+        self.alloc_blocks = 0
+        self.alloc_peak_kb = None
+
+    @property
+    def pandas(self):
+        return max(self.wall - self.plotly, 0.0)
+
+    def as_dict(self):
+        return {
+            "section": self.key,
+            "wall_ms": round(self.wall * 1000, 3),
+            "pandas_ms": round(self.pandas * 1000, 3),
+            "plotly_ms": round(self.plotly * 1000, 3),
+            "alloc_blocks": self.alloc_blocks,
+            "alloc_peak_kb": self.alloc_peak_kb,
+        }
+
+
+_cold = True
+
+
+class RerunProfile:
+    """Section records for one script rerun; a disabled profile records nothing.
+
+    Create it first thing in the script, so paint times include the imports after it.
+    """
+
+    def __init__(self, enabled, labels=None):
+        global _cold
+        self.started = time.perf_counter()
+        self.cold, _cold = _cold, False
+        self.enabled = enabled
+        self.labels = labels or {}
+        self.records = []
+        self.paints = {}
+
+    def painted(self, key):
+        """Note that section key has been sent to the browser."""
+        if key not in self.paints:
+            self.paints[key] = time.perf_counter() - self.started
+            registry.observe_paint(key, self.paints[key], self.cold)
+
+    @contextmanager
+    def section(self, key):
+        if not self.enabled:
+            yield
+            return
+        if PROFILE_TRACEMALLOC and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        record = SectionRecord(key)
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        blocks = sys.getallocatedblocks()
+        _active.record = record
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            record.wall = time.perf_counter() - start
+            _active.record = None
+            record.alloc_blocks = sys.getallocatedblocks() - blocks
+            if tracing:
+                record.alloc_peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+            self.records.append(record)
+
+    def finish(self):
+        if not self.enabled:
+            return
+        for record in self.records:
+            registry.observe(record)
+            if PROFILE_LOG:
+                perf_log.info(json.dumps({**self.labels, **record.as_dict()}))
+
+
+@contextmanager
+def phase_plotly():
+    """Attribute the enclosed time to Plotly for the section currently being profiled."""
+    record = getattr(_active, "record", None)
+    if record is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record.plotly += time.perf_counter() - start
+
+
+# === Process-wide aggregation + Prometheus text format ===
+class MetricsRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+        self.paints = {}
+
+    def observe(self, record):
+        with self.lock:
+            s = self.series.setdefault(record.key, {
+                "count": 0, "wall": 0.0, "pandas": 0.0, "plotly": 0.0,
+                "buckets": [0] * len(HISTOGRAM_BUCKETS),
+            })
+            s["count"] += 1
+            s["wall"] += record.wall
+            s["pandas"] += record.pandas
+            s["plotly"] += record.plotly
+            for i, bound in enumerate(HISTOGRAM_BUCKETS):
+                if record.wall <= bound:
+                    s["buckets"][i] += 1
+
+    def observe_paint(self, key, seconds, cold):
+        with self.lock:
+            s = self.paints.setdefault((key, "cold" if cold else "warm"), {
+                "count": 0, "sum": 0.0, "buckets": [0] * len(HISTOGRAM_BUCKETS),
+            })
+            s["count"] += 1
+            s["sum"] += seconds
+            for i, bound in enumerate(HISTOGRAM_BUCKETS):
+                if seconds <= bound:
+                    s["buckets"][i] += 1
+
+    def prometheus_text(self):
+        lines = [
+            "# HELP dashboard_section_seconds Wall time spent rendering a dashboard section.",
+            "# TYPE dashboard_section_seconds histogram",
+        ]
+        with self.lock:
+            series = {k: dict(v, buckets=list(v["buckets"])) for k, v in self.series.items()}
+        for key, s in sorted(series.items()):
+            for bound, count in zip(HISTOGRAM_BUCKETS, s["buckets"]):
+                lines.append(f'dashboard_section_seconds_bucket{{section="{key}",le="{bound}"}} {count}')
+            lines.append(f'dashboard_section_seconds_bucket{{section="{key}",le="+Inf"}} {s["count"]}')
+            lines.append(f'dashboard_section_seconds_sum{{section="{key}"}} {s["wall"]:.6f}')
+            lines.append(f'dashboard_section_seconds_count{{section="{key}"}} {s["count"]}')
+        for phase in ("pandas", "plotly"):
+            lines.append(f"# HELP dashboard_section_{phase}_seconds_total Section time spent in {phase}.")
+            lines.append(f"# TYPE dashboard_section_{phase}_seconds_total counter")
+            for key, s in sorted(series.items()):
+                lines.append(f'dashboard_section_{phase}_seconds_total{{section="{key}"}} {s[phase]:.6f}')
+
+        lines.append("# HELP dashboard_time_to_paint_seconds Time from the start of a rerun until a section was sent.")
+        lines.append("# TYPE dashboard_time_to_paint_seconds histogram")
+        with self.lock:
+            paints = {k: dict(v, buckets=list(v["buckets"])) for k, v in self.paints.items()}
+        for (key, start), s in sorted(paints.items()):
+            labels = f'section="{key}",start="{start}"'
+            for bound, count in zip(HISTOGRAM_BUCKETS, s["buckets"]):
+                lines.append(f'dashboard_time_to_paint_seconds_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f'dashboard_time_to_paint_seconds_bucket{{{labels},le="+Inf"}} {s["count"]}')
+            lines.append(f'dashboard_time_to_paint_seconds_sum{{{labels}}} {s["sum"]:.6f}')
+            lines.append(f'dashboard_time_to_paint_seconds_count{{{labels}}} {s["count"]}')
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = registry.prometheus_text().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+_server_lock = threading.Lock()
+_server = None
+
+
+def start_metrics_server(port=None):
+    """Serve /metrics on a background thread (once per process)."""
+    global _server
+    port = port or METRICS_PORT
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((METRICS_HOST, int(port)), _MetricsHandler)
+            except OSError:
+                # Another worker on this host already serves the port
+                return None
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def render_debug_panel(profile):
+    import pandas as pd
+    import streamlit as st
+
+    with st.sidebar.expander("🐞 Performance (this rerun)", expanded=True):
+        if not profile.records:
+            st.caption("No sections ran.")
+            return
+        table = pd.DataFrame([r.as_dict() for r in profile.records]).set_index("section")
+        st.dataframe(table)
+        total = sum(r.wall for r in profile.records)
+        st.caption(f"Total section time: {total * 1000:.1f} ms")
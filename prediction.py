@@ -0,0 +1,256 @@
+# === Yield prediction ===
+# Predicts a district's yield from its June–December climate columns, so a season
+# can be judged before harvest. One model per district:
+#   ridge  (default) ridge regression on standardized features, in numpy; the
+#          penalty is picked by exact leave-one-year-out error
+#   gbt    scikit-learn's histogram gradient-boosted trees (PREDICTION_MODEL=gbt)
+# Training and inference run offline, never on a dashboard rerun:
+#
+#     python prediction.py --state Assam
+#
+# Each model is saved under MODEL_DIR with the hash of its training rows and only
+# retrained when that hash changes. Inference covers every district of the state
+# in one batched pass and is written to MODEL_DIR/<state>/predictions.feather for
+# the dashboard. Years with a yield get their held-out prediction (the model never
+# saw that year), years with climate but no yield yet get the full model's forecast.
+import argparse
+import hashlib
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from data_store import atomic_path, write_atomic
+from ingest import delta_file
+from stats import CLIMATE_COLUMNS
+
+MODEL_DIR = os.environ.get("DASHBOARD_MODEL_DIR", "models")
+PREDICTION_MODEL = os.environ.get("PREDICTION_MODEL", "ridge")
+MODEL_FORMAT = 1
+MIN_TRAINING_YEARS = 8
+RIDGE_ALPHAS = np.logspace(-1, 3, 9)
+PREDICTIONS = "predictions.feather"
+
+
+def features(frame):
+    return frame.reindex(columns=CLIMATE_COLUMNS).to_numpy(dtype=float)
+
+
+def training_hash(frame, kind):
+    digest = hashlib.sha256(f"{MODEL_FORMAT}:{kind}:{','.join(CLIMATE_COLUMNS)}".encode())
+    digest.update(np.ascontiguousarray(frame["year"].to_numpy(dtype=float)).tobytes())
+    digest.update(np.ascontiguousarray(frame["yield"].to_numpy(dtype=float)).tobytes())
+    digest.update(np.ascontiguousarray(features(frame)).tobytes())
+    return digest.hexdigest()
+
+
+class RidgeModel:
+    kind = "ridge"
+
+    def __init__(self, mean, scale, coef, intercept, alpha, years, held_out, digest):
+        self.mean = mean
+        self.scale = scale
+        self.coef = coef
+        self.intercept = intercept
+        self.alpha = alpha
+        self.years = years
+        self.held_out = held_out
+        self.digest = digest
+
+    @classmethod
+    def fit(cls, X, y, years, digest, alphas=RIDGE_ALPHAS):
+        # Missing months are imputed with the district mean, i.e. 0 once standardized
+        mean = np.nanmean(X, axis=0)
+        mean = np.where(np.isnan(mean), 0.0, mean)
+        X = np.where(np.isnan(X), mean, X)
+        scale = X.std(axis=0)
+        scale[scale == 0] = 1.0
+        Z = (X - mean) / scale
+        intercept = y.mean()
+
+        # Every alpha at once through one SVD: fitted values and leverages give the
+        # leave-one-out residuals (y - fit) / (1 - leverage) without refitting
+        U, S, Vt = np.linalg.svd(Z, full_matrices=False)
+        Uy = U.T @ (y - intercept)
+        shrink = S**2 / (S**2 + alphas[:, None])
+        fitted = intercept + np.einsum("nk,ak,k->an", U, shrink, Uy)
+        leverage = np.einsum("nk,ak->an", U**2, shrink) + 1 / len(y)
+        held_out_residuals = (y - fitted) / (1 - leverage)
+        best = int(np.argmin((held_out_residuals**2).mean(axis=1)))
+
+        coef = Vt.T @ (S / (S**2 + alphas[best]) * Uy)
+        return cls(mean, scale, coef, intercept, alphas[best], years, y - held_out_residuals[best], digest)
+
+    @staticmethod
+    def predict_batch(models, X):
+        """(districts × years) predictions for X stacked as (districts × years × features)."""
+        mean = np.stack([m.mean for m in models])[:, None]
+        scale = np.stack([m.scale for m in models])[:, None]
+        coef = np.stack([m.coef for m in models])
+        intercept = np.array([m.intercept for m in models])
+        Z = (np.where(np.isnan(X), mean, X) - mean) / scale
+        return np.einsum("dyp,dp->dy", Z, coef) + intercept[:, None]
+
+
+class BoostedModel:
+    kind = "gbt"
+
+    def __init__(self, model, years, held_out, digest):
+        self.model = model
+        self.years = years
+        self.held_out = held_out
+        self.digest = digest
+
+    @classmethod
+    def fit(cls, X, y, years, digest):
+        from sklearn.ensemble import HistGradientBoostingRegressor
+        from sklearn.model_selection import KFold, cross_val_predict
+        model = HistGradientBoostingRegressor(max_iter=200, learning_rate=0.05, max_depth=3,
+                                              min_samples_leaf=3, random_state=0)
+        held_out = cross_val_predict(model, X, y, cv=KFold(5))
+        return cls(model.fit(X, y), years, held_out, digest)
+
+    @staticmethod
+    def predict_batch(models, X):
+        return np.stack([m.model.predict(X[i]) for i, m in enumerate(models)])
+
+
+MODELS = {"ridge": RidgeModel, "gbt": BoostedModel}
+
+
+# === Model store ===
+def state_dir(root, state):
+    return os.path.join(root, os.path.dirname(delta_file(state, "_")))
+
+
+def model_path(root, state, district):
+    return os.path.join(root, os.path.splitext(delta_file(state, district))[0] + ".pkl")
+
+
+def load_model(path):
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+
+
+def save_model(path, model):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_atomic(path, pickle.dumps(model))
+
+
+def train_state(catalog, state, kind=PREDICTION_MODEL, root=MODEL_DIR):
+    """Train or reuse every district's model and write the state's predictions table.
+
+    Returns (trained, reused, skipped) district lists.
+    """
+    model_class = MODELS[kind]
+    frames, versions, models = {}, {}, {}
+    trained, reused, skipped = [], [], []
+    for district, entry in catalog.index[state].items():
+        # Incomplete rows included: climate-only years are what gets forecast
+        frame = entry.read(complete=False)
+        observed = frame.dropna(subset=["yield"]) if "yield" in frame else frame.iloc[:0]
+        if len(observed) < MIN_TRAINING_YEARS:
+            skipped.append(district)
+            continue
+        digest = training_hash(observed, kind)
+        path = model_path(root, state, district)
+        model = load_model(path)
+        if model is None or model.kind != kind or model.digest != digest:
+            model = model_class.fit(features(observed), observed["yield"].to_numpy(dtype=float),
+                                    observed["year"].to_numpy(), digest)
+            save_model(path, model)
+            trained.append(district)
+        else:
+            reused.append(district)
+        frames[district], versions[district], models[district] = frame, entry.version, model
+
+    if models:
+        write_predictions(predict_state(models, frames, versions, kind), state, root)
+    return trained, reused, skipped
+
+
+def predict_state(models, frames, versions, kind):
+    """One row per district-year with climate data: actual, predicted, held_out and coverage."""
+    districts = list(models)
+    years = np.unique(np.concatenate([frames[d]["year"].to_numpy() for d in districts]))
+    X = np.full((len(districts), len(years), len(CLIMATE_COLUMNS)), np.nan)
+    actual = np.full((len(districts), len(years)), np.nan)
+    for i, d in enumerate(districts):
+        rows = np.searchsorted(years, frames[d]["year"].to_numpy())
+        X[i, rows] = features(frames[d])
+        actual[i, rows] = frames[d]["yield"].to_numpy(dtype=float) if "yield" in frames[d] else np.nan
+
+    # One batched pass for every district; the held-out predictions replace it for observed years
+    predicted = MODELS[kind].predict_batch([models[d] for d in districts], X)
+    held_out = np.zeros_like(predicted, dtype=bool)
+    for i, d in enumerate(districts):
+        rows = np.searchsorted(years, models[d].years)
+        predicted[i, rows] = models[d].held_out
+        held_out[i, rows] = True
+
+    coverage = (~np.isnan(X)).mean(axis=2)
+    d_idx, y_idx = np.nonzero(coverage > 0)
+    return pd.DataFrame({
+        "district": np.array(districts, dtype=object)[d_idx],
+        "year": years[y_idx],
+        "actual": actual[d_idx, y_idx],
+        "predicted": predicted[d_idx, y_idx],
+        "held_out": held_out[d_idx, y_idx],
+        "coverage": coverage[d_idx, y_idx],
+        "version": np.array([versions[d] for d in districts])[d_idx],
+        "model": kind,
+    })
+
+
+def write_predictions(table, state, root=MODEL_DIR):
+    path = os.path.join(state_dir(root, state), PREDICTIONS)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with atomic_path(path) as tmp:
+        table.to_feather(tmp, compression="uncompressed")
+
+
+_loaded_predictions = {}
+
+
+def predictions_version(state, root=MODEL_DIR):
+    try:
+        return os.stat(os.path.join(state_dir(root, state), PREDICTIONS)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def read_predictions(state, root=MODEL_DIR):
+    """The state's predictions table (None before the first training run), re-read when the job rewrites it."""
+    path = os.path.join(state_dir(root, state), PREDICTIONS)
+    stamp = predictions_version(state, root)
+    if stamp is None:
+        return None
+    cached = _loaded_predictions.get(path)
+    if cached is None or cached[0] != stamp:
+        cached = _loaded_predictions[path] = (stamp, pd.read_feather(path))
+    return cached[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train per-district yield models and precompute predictions.")
+    parser.add_argument("--state", action="append", help="State to train (repeatable; default: all)")
+    parser.add_argument("--model", choices=list(MODELS), default=PREDICTION_MODEL)
+    parser.add_argument("--root", default=MODEL_DIR)
+    args = parser.parse_args(argv)
+
+    from catalog import DatasetCatalog
+    catalog = DatasetCatalog.discover()
+    for state in args.state or catalog.states():
+        trained, reused, skipped = train_state(catalog, state, args.model, args.root)
+        print(f"{state}: {len(trained)} trained, {len(reused)} unchanged, {len(skipped)} with too few years")
+
+
+if __name__ == "__main__":
+    # Run through the module so saved models pickle as prediction.RidgeModel, not
+    # __main__.RidgeModel, and load the same from the CLI and from imports
+    import prediction
+    prediction.main()
@@ -0,0 +1,208 @@
+# === Farmer-friendly summary reports ===
+# Builds the Section 13 summary PDF, and a headless batch mode that renders every
+# catalogued district × year in a process pool straight into an in-memory zip, as
+# <state>/<district>/<district>_<year>_summary.pdf:
+#
+#     python reports.py --out summaries.zip --jobs 8 [--state Assam]
+#
+# Inside the dashboard, exports go through run_export(): at most EXPORT_WORKERS of
+# them are built at a time, however many sessions ask, and sessions asking for the
+# same export at once share one build.
+import argparse
+import io
+import os
+import re
+import threading
+import time
+import unicodedata
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+
+import pandas as pd
+
+from data_store import WORKBOOK
+from singleflight import SingleFlight
+
+EXPORT_WORKERS = int(os.environ.get("DASHBOARD_EXPORT_WORKERS", "2"))
+
+# 🧹 Cleaner for PDF-safe text
+def clean_for_pdf(text):
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if ord(c) < 128)
+    text = text.replace("°", " degrees ")
+    return re.sub(r'[^\x00-\x7F]+', '', text)
+
+# 📝 Summary Text
+def generate_summary_text(df_year, season_curr, season_prev, year, district):
+    lines = []
+
+    yield_val = df_year["yield"].values[0]
+    lines.append(f"This year ({year}), the crop yield in {district} is {yield_val:.2f} tons per hectare.")
+
+    monsoon_curr, post_curr = season_curr["Monsoon"], season_curr["Post-monsoon"]
+
+    if season_prev is not None:
+        monsoon_prev, post_prev = season_prev["Monsoon"], season_prev["Post-monsoon"]
+        change_monsoon = monsoon_curr - monsoon_prev
+        change_post = post_curr - post_prev
+
+        monsoon_msg = "increased" if change_monsoon > 0 else "decreased"
+        post_msg = "increased" if change_post > 0 else "decreased"
+
+        lines.append(f"Monsoon rainfall has {monsoon_msg} by {abs(change_monsoon):.1f} mm compared to last year.")
+        lines.append(f"Post-monsoon rainfall has {post_msg} by {abs(change_post):.1f} mm.")
+    else:
+        lines.append("No previous year data available for rainfall comparison.")
+
+    temp_cols = [f"temp_{m}" for m in ['6', '7', '8', '9', '10', '11', '12']]
+    temp_avg = df_year[temp_cols].mean(axis=1).values[0]
+    lines.append(f"The average temperature this season was around {temp_avg:.1f} degrees Celsius.")
+
+    if yield_val < 2:
+        lines.append("Yield is low. Please consult an expert or check your irrigation/fertilizer setup.")
+    elif yield_val < 3:
+        lines.append("Yield is moderate. Keep monitoring rainfall and temperature carefully.")
+    else:
+        lines.append("Good yield! Conditions this season were favorable.")
+
+    lines.append("This is an auto-generated summary to help understand seasonal trends easily.")
+    return "\n\n".join(lines)
+
+# 📤 PDF Builder
+def build_summary_pdf(df_year, district_stats, district_years, year, district, selected_state):
+    season_prev = district_stats.season_totals(year - 1) if year > district_years.first_year else None
+    summary_text = generate_summary_text(df_year, district_stats.season_totals(year), season_prev, year, district)
+
+    # Imported here so fpdf (and the PIL it pulls in) stays off the dashboard's startup path
+    from fpdf import FPDF
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font("Arial", size=12)
+    pdf.set_auto_page_break(auto=True, margin=15)
+
+    pdf.set_font("Arial", 'B', size=16)
+    title = f"Farmer Summary Report – {district}, {selected_state} – {year}"
+    pdf.cell(0, 10, clean_for_pdf(title), ln=True)
+
+    pdf.set_font("Arial", size=12)
+    for line in summary_text.split("\n"):
+        clean_line = clean_for_pdf(line)
+        pdf.multi_cell(0, 10, clean_line)
+    return pdf
+
+
+def pdf_bytes(pdf):
+    # fpdf 1.7 returns a latin-1 str for dest="S", fpdf2 returns a bytearray
+    out = pdf.output(dest="S")
+    return out.encode("latin-1") if isinstance(out, str) else bytes(out)
+
+
+def summary_filename(district, year):
+    return f"{district}_{year}_summary.pdf"
+
+
+# 📁 Rainfall trend workbook (Section 4 download)
+def trend_excel_bytes(left_table_df, right_table_df):
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
+        left_table_df.to_excel(writer, index=False, sheet_name='Yearly Comparison')
+        right_table_df.to_excel(writer, index=False, sheet_name='Cumulative Trend')
+    return buffer.getvalue()
+
+
+# === Dashboard exports ===
+# A PDF or workbook takes a few milliseconds of pure-Python work that holds the
+# GIL, so the pool is threads: it bounds how many run at once, not where.
+_export_pool = None
+_export_pool_lock = threading.Lock()
+exports = SingleFlight()
+
+
+def export_pool():
+    global _export_pool
+    with _export_pool_lock:
+        if _export_pool is None:
+            _export_pool = ThreadPoolExecutor(EXPORT_WORKERS, thread_name_prefix="export")
+        return _export_pool
+
+
+def run_export(key, build):
+    """build() on the export pool (inline when EXPORT_WORKERS=0); one build per key at a time."""
+    if EXPORT_WORKERS < 1:
+        return exports.do(key, build)
+    return exports.do(key, lambda: export_pool().submit(build).result())
+
+
+# === Batch generation ===
+# Districts come from the same DatasetCatalog as the dashboard (workbook, data/<State>/
+# sources and ingested rows), listed from names alone. Each worker process builds
+# its own catalog once and then renders whole districts, so the per-task payload
+# is just a (state, district) pair.
+_worker = {}
+
+
+def _init_worker(workbook):
+    from catalog import DatasetCatalog
+    _worker["catalog"] = DatasetCatalog.discover(workbook=workbook)
+
+
+def _render_district(task, years=None):
+    from catalog import LoadedDistrict
+    state, district = task
+    # Read straight from source: a worker only sees each district once, so the LRU would not help
+    entry = _worker["catalog"].index[state][district]
+    loaded = LoadedDistrict(entry, entry.read())
+    out = []
+    for year in (years or loaded.years.years):
+        if year not in loaded.years:
+            continue
+        year = int(year)
+        pdf = build_summary_pdf(loaded.years.row(loaded.frame, year), loaded.stats, loaded.years,
+                                year, district, state)
+        out.append((f"{state}/{district}/{summary_filename(district, year)}", pdf_bytes(pdf)))
+    return out
+
+
+def generate_all_reports(workbook=WORKBOOK, states=None, districts=None, years=None, jobs=None):
+    """Render summary PDFs for every catalogued district × year and return them as zip bytes."""
+    from catalog import DatasetCatalog
+    index = DatasetCatalog.discover(workbook=workbook).index
+    tasks = [(state, district) for state in (states or index) for district in index.get(state, {})
+             if districts is None or district in districts]
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as bundle, ExitStack() as stack:
+        if jobs == 1:
+            _init_worker(workbook)
+            run = map
+        else:
+            pool = stack.enter_context(ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(workbook,)))
+            run = pool.map
+        for files in run(_render_district, tasks, [years] * len(tasks)):
+            for name, data in files:
+                bundle.writestr(name, data)
+    return buffer.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate farmer summary PDFs for every district and year.")
+    parser.add_argument("--workbook", default=WORKBOOK)
+    parser.add_argument("--state", action="append", help="Limit to this state (repeatable; default: all)")
+    parser.add_argument("--district", action="append", help="Limit to this district (repeatable)")
+    parser.add_argument("--year", type=int, action="append", help="Limit to this year (repeatable)")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="Worker processes (1 = run inline)")
+    parser.add_argument("--out", default="summary_reports.zip")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    bundle = generate_all_reports(args.workbook, args.state, args.district, args.year, args.jobs)
+    with open(args.out, "wb") as f:
+        f.write(bundle)
+    with zipfile.ZipFile(io.BytesIO(bundle)) as z:
+        count = len(z.namelist())
+    print(f"Wrote {count} reports to {args.out} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+# === Dashboard section registry ===
+# Each section is a render function registered in page order together with the
+# context inputs it reads. app.py decides per session which sections run, and lazy
+# sections only execute while their expander is open.
+import calendar
+
+import pandas as pd
+import streamlit as st
+
+import figures
+from daily import daily_years, monthly_rollup, partition_version, read_daily
+from figures import figure_cache
+from instrumentation import phase_plotly
+from prediction import predictions_version, read_predictions
+from reports import build_summary_pdf, pdf_bytes, run_export, summary_filename, trend_excel_bytes
+from stats import MONTH_NUMS, RAIN_BADGES, SEASON_MONTHS, VAR_PREFIX_MAP, monsoon_warning, monthly_rainfall_status
+
+
+class Section:
+    def __init__(self, key, title, inputs, render, lazy=False):
+        self.key = key
+        self.title = title
+        self.inputs = inputs
+        self.render = render
+        self.lazy = lazy
+
+    def heading(self, ctx):
+        return self.title.format(year=ctx.year)
+
+    def run(self, ctx):
+        return self.render(**{name: getattr(ctx, name) for name in self.inputs})
+
+
+class SectionContext:
+    """Everything a section may ask for, resolved once per rerun."""
+
+    def __init__(self, state, district, year, df, district_years, district_stats, version=0, snapshot=None):
+        self.state = state
+        self.district = district
+        # Identifies this district's data in caches; bumped when new rows are ingested
+        self.cache_key = (state, district, version)
+        self.year = year
+        self.df = df
+        self.district_years = district_years
+        self.district_stats = district_stats
+        self.df_year = district_years.row(df, year)
+        # Pre-rendered bundle from snapshot.py, or None when this district-year is computed live
+        self.snapshot = snapshot
+
+
+SECTIONS = []
+
+
+def plotly_chart(fig):
+    with phase_plotly():
+        st.plotly_chart(fig, use_container_width=True)
+
+
+def snapshot_export(snapshot, name, build):
+    data = snapshot.export(name) if snapshot is not None else None
+    return data if data is not None else build()
+
+
+def section(key, title, inputs, lazy=False):
+    def register(render):
+        SECTIONS.append(Section(key, title, inputs, render, lazy))
+        return render
+    return register
+
+
+# === Section 1: Yield Status ===
+@section("yield_status", "📊 Yield Status", ("df_year", "district_stats", "year"))
+def yield_status(df_year, district_stats, year):
+    current_yield = df_year['yield'].values[0]
+    status = district_stats.yield_category(current_yield)
+    st.markdown(f"*Yield in {year}:* {current_yield:.2f} tons/ha")
+    st.markdown(f"*Category:* {status}")
+
+
+# === Section 2: Climate Warning ===
+@section("climate_warning", "🌦️ Climate Warnings (Monsoon Months)", ("district_stats", "year"))
+def climate_warning(district_stats, year):
+    if monsoon_warning(district_stats, year):
+        st.markdown("🚨 *Warning:* Significant deviation in monsoon climate detected!")
+    else:
+        st.markdown("✅ No abnormal weather during monsoon months.")
+
+
+# === Section 3: Line Plot for All Variables ===
+@section("climate_trend", "📈 Monsoon Climate Trend (June–Dec)", ("df_year", "district", "cache_key", "year"))
+def climate_trend(df_year, district, cache_key, year):
+    fig = figure_cache.get("climate_trend", cache_key, year, lambda: figures.climate_trend(df_year, district, year))
+    plotly_chart(fig)
+
+
+# === Section 4: Rainfall Pie Chart + Comparison Tables ===
+XLSX_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+@st.cache_data(max_entries=512, show_spinner=False)
+def trend_excel(cache_key, year, _left_table_df, _right_table_df):
+    return run_export(("trend.xlsx", cache_key, year), lambda: trend_excel_bytes(_left_table_df, _right_table_df))
+
+
+def trend_icon(change):
+    return "📈" if change > 1 else "📉" if change < -1 else "➡️"
+
+
+def color_change(x):
+    return "color: green" if isinstance(x, str) and '+' in x else ("color: red" if '-' in x else "")
+
+
+def trend_tables(district_stats, district_years, year):
+    """(previous-year table, cumulative-trend table) for Section 4; None where there is no history."""
+    # --- Current Year Rainfall ---
+    current_percent = district_stats.season_share(year)
+
+    # --- Previous Year Comparison Table ---
+    left_table_df, right_table_df = None, None
+    if year > district_years.first_year:
+        prev_share = district_stats.season_share_of_total(year - 1)
+        left_table = []
+        for season in SEASON_MONTHS:
+            prev_percent = prev_share[season]
+            curr = current_percent[season]
+            change = curr - prev_percent
+            left_table.append({
+                "Season": season,
+                f"{year - 1} (%)": f"{prev_percent:.1f}%",
+                f"Change": f"{change:+.1f}%",
+                "Trend": trend_icon(change)
+            })
+        left_table_df = pd.DataFrame(left_table)
+
+    # --- Cumulative Trend from 1981 to Y-1 ---
+    if year > district_years.first_year + 1:
+        cumulative_share = district_stats.cumulative_season_share(year)
+        right_table = []
+        for season in SEASON_MONTHS:
+            cumulative_percent = cumulative_share[season]
+            curr = current_percent[season]
+            change = curr - cumulative_percent
+            right_table.append({
+                "Season": season,
+                "Avg (1981–{})".format(year - 1): f"{cumulative_percent:.1f}%",
+                f"{year} (%)": f"{curr:.1f}%",
+                "Change": f"{change:+.1f}%",
+                "Trend": trend_icon(change)
+            })
+        right_table_df = pd.DataFrame(right_table)
+    return left_table_df, right_table_df
+
+
+@section("seasonal_rainfall", "🌧️ Seasonal Rainfall Distribution",
+         ("district_stats", "district_years", "district", "cache_key", "year", "snapshot"))
+def seasonal_rainfall(district_stats, district_years, district, cache_key, year, snapshot):
+    # --- Pie Chart ---
+    fig_pie = figure_cache.get("season_pie", cache_key, year, lambda: figures.season_pie(district_stats, year))
+    plotly_chart(fig_pie)
+
+    left_table_df, right_table_df = trend_tables(district_stats, district_years, year)
+
+    # --- Display Both Tables ---
+    if left_table_df is not None or right_table_df is not None:
+        st.markdown("### 📊 Rainfall Trend Comparison")
+        col1, col2 = st.columns(2)
+        with col1:
+            if left_table_df is not None:
+                st.markdown(f"**📅 {year-1} → {year} Comparison**")
+                st.dataframe(left_table_df.style.applymap(color_change, subset=["Change"]))
+        with col2:
+            if right_table_df is not None:
+                st.markdown(f"**📈 Cumulative Trend (1981 → {year})**")
+                st.dataframe(right_table_df.style.applymap(color_change, subset=["Change"]))
+
+    # --- Optional: Download CSV ---
+    # The workbook is only built when the button is clicked (deferred download)
+    if left_table_df is not None and right_table_df is not None:
+        st.download_button(
+            "📁 Download Rainfall Trend (Excel)",
+            data=lambda: snapshot_export(snapshot, "trend.xlsx",
+                                         lambda: trend_excel(cache_key, year, left_table_df, right_table_df)),
+            file_name=f"rainfall_trend_comparison_{year}.xlsx",
+            mime=XLSX_MIME,
+            on_click="ignore",
+        )
+
+    # --- Optional: Monsoon % Line Plot over Years ---
+    st.markdown("### 📈 Monsoon Share Trend Over Years")
+    fig_line = figure_cache.get("share_trend", cache_key, None, lambda: figures.share_trend(district_stats))
+    plotly_chart(fig_line)
+
+
+# === Section 5: Yield vs District Avg (Baseline) ===
+@section("yield_baseline", "🌾 Yield Comparison with District Average",
+         ("df_year", "district_stats", "cache_key", "year"))
+def yield_baseline(df_year, district_stats, cache_key, year):
+    st.markdown("*District Average based on 2015–2019 period*")
+    fig_bar = figure_cache.get("yield_baseline", cache_key, year, lambda: figures.yield_baseline(df_year, district_stats))
+    plotly_chart(fig_bar)
+
+
+# === Section 5b: Predicted vs Actual Yield (from prediction.py) ===
+@section("yield_prediction", "🤖 Predicted vs Actual Yield", ("state", "district", "year", "cache_key"), lazy=True)
+def yield_prediction(state, district, year, cache_key):
+    # Only reads the table prediction.py wrote; nothing is trained or predicted here
+    table = read_predictions(state)
+    rows = None if table is None else table[table["district"] == district]
+    if rows is None or rows.empty:
+        st.info(f"No yield model for {district} yet. Run `python prediction.py --state {state}` to train one.")
+        return
+
+    current = rows[rows["year"] == year]
+    if len(current) and current["held_out"].iloc[0]:
+        predicted, actual = current["predicted"].iloc[0], current["actual"].iloc[0]
+        st.markdown(f"*Predicted yield for {year}:* **{predicted:.2f} tons/ha** (actual {actual:.2f}, "
+                    f"{actual - predicted:+.2f}) — predicted from climate alone, without {year}'s yield")
+    for forecast in rows[rows["actual"].isna()].itertuples():
+        st.markdown(f"*Forecast for {forecast.year}:* **{forecast.predicted:.2f} tons/ha** "
+                    f"(from {forecast.coverage:.0%} of the June–Dec climate data so far)")
+    if rows["version"].iloc[0] != cache_key[2]:
+        st.caption("New rows were ingested after this model was trained; rerun prediction.py to update it.")
+
+    fig = figure_cache.get("yield_prediction", (state, district, predictions_version(state)), None,
+                           lambda: figures.yield_prediction(rows, district))
+    plotly_chart(fig)
+
+
+# === Section 6: Emoji Rainfall Cards ===
+@section("monthly_rainfall", "🗓️ Monthly Rainfall Status", ("df_year", "district_stats", "year"))
+def monthly_rainfall(df_year, district_stats, year):
+    emoji_table = [
+        (month_label, f"{curr:.1f} mm", RAIN_BADGES[level])
+        for month_label, curr, level in monthly_rainfall_status(df_year, district_stats, year)
+    ]
+    st.table(pd.DataFrame(emoji_table, columns=["Month", "Rainfall", "Status"]))
+
+
+# === Section 7: Temperature vs Average Line Plot ===
+@section("temperature", "🌡️ Temperature vs Average (June–Dec)",
+         ("df_year", "district_stats", "cache_key", "year"), lazy=True)
+def temperature(df_year, district_stats, cache_key, year):
+    fig_temp = figure_cache.get("temperature", cache_key, year, lambda: figures.temperature(df_year, district_stats, year))
+    plotly_chart(fig_temp)
+
+
+# === Section 8: Accumulated Rainfall Line Plot ===
+@section("accumulated_rain", "📈 Accumulated Rainfall Comparison",
+         ("df_year", "district_stats", "cache_key", "year"), lazy=True)
+def accumulated_rain(df_year, district_stats, cache_key, year):
+    fig_acc = figure_cache.get("accumulated_rain", cache_key, year, lambda: figures.accumulated_rain(df_year, district_stats))
+    plotly_chart(fig_acc)
+
+
+# === Section 8b: Daily Rainfall Drill-down (from daily.py partitions) ===
+@section("daily_rainfall", "🌦️ Daily Rainfall Drill-down", ("state", "district", "year", "district_years"), lazy=True)
+def daily_rainfall(state, district, year, district_years):
+    # Seasons come from the daily partitions, so one without a yield yet (and so not
+    # in the sidebar's years) can still be opened
+    seasons = daily_years(state, district)
+    if not seasons:
+        st.info(f"No daily rainfall records for {district}.")
+        return
+    # Keyed on the sidebar year so the default follows it when it has daily records
+    year = st.selectbox("Season", seasons, index=seasons.index(year) if year in seasons else len(seasons) - 1,
+                        key=f"daily_year:{year}")
+    # Reads only the selected district-year's partition, never the daily history
+    daily = read_daily(state, district, year)
+    months = [] if daily is None else sorted(daily.loc[daily["variable"] == "precip_flux", "date"].dt.month.unique())
+    if not months:
+        st.info(f"No daily rainfall records for {district} in {year}.")
+        return
+    if year not in district_years:
+        rollup = monthly_rollup(daily)
+        totals = [f"{calendar.month_abbr[int(m)]} {rollup[f'precip_flux_{m}']:.1f} mm"
+                  for m in MONTH_NUMS if f"precip_flux_{m}" in rollup]
+        st.caption(f"{year} has no yield yet, so it is not in the dashboard's years. "
+                   + (f"Monthly rainfall so far: {', '.join(totals)}." if totals else "No month is complete yet."))
+    month = st.selectbox("Month", months, format_func=lambda m: calendar.month_name[m], key="daily_month")
+    version = partition_version(state, district, year)
+    fig = figure_cache.get(f"daily_rainfall:{month}", (state, district, version), year,
+                           lambda: figures.daily_rainfall(daily, int(year), month))
+    plotly_chart(fig)
+
+
+# === Section 9: Seasonal Rainfall Bar + Bullet Chart ===
+@section("seasonal_bars", "📊 Seasonal Rainfall — Bar & Bullet Charts",
+         ("district_stats", "cache_key", "year"), lazy=True)
+def seasonal_bars(district_stats, cache_key, year):
+    fig_bar = figure_cache.get("season_bar", cache_key, year, lambda: figures.season_bar(district_stats, year))
+    plotly_chart(fig_bar)
+    fig_bullet = figure_cache.get("monsoon_bullet", cache_key, year, lambda: figures.monsoon_bullet(district_stats, year))
+    plotly_chart(fig_bullet)
+
+
+# === Section 10: Climate Comparison: [Selected Year] vs 2015–2019 Avg (Bar Plots) ===
+@section("climate_bars", "📊 Climate Comparison: {year} vs Avg (Bar Plots)",
+         ("df_year", "district_stats", "district", "cache_key", "year"), lazy=True)
+def climate_bars(df_year, district_stats, district, cache_key, year):
+    col1, col2 = st.columns(2)
+    for i, prefix in enumerate(VAR_PREFIX_MAP):
+        fig = figure_cache.get(f"climate_bar:{prefix}", cache_key, year,
+                               lambda: figures.climate_bar(df_year, district_stats, district, year, prefix))
+        with [col1, col2][i % 2]:
+            plotly_chart(fig)
+
+
+# === Section 11: Min Temperature vs Average Line Plot ===
+@section("min_temperature", "❄️ Min Temperature vs Average (June–Dec)",
+         ("df_year", "district_stats", "cache_key", "year"), lazy=True)
+def min_temperature(df_year, district_stats, cache_key, year):
+    fig_tmin = figure_cache.get("min_temperature", cache_key, year, lambda: figures.min_temperature(df_year, district_stats, year))
+    plotly_chart(fig_tmin)
+
+
+# === Section 12: Max Temperature vs Average Line Plot ===
+@section("max_temperature", "🔥 Max Temperature vs Average (June–Dec)",
+         ("df_year", "district_stats", "cache_key", "year"), lazy=True)
+def max_temperature(df_year, district_stats, cache_key, year):
+    fig_tmax = figure_cache.get("max_temperature", cache_key, year, lambda: figures.max_temperature(df_year, district_stats, year))
+    plotly_chart(fig_tmax)
+
+
+# === Section 13: Farmer-Friendly Summary Report ===
+# 📤 PDF Generator Function (in memory, cached per district/year)
+@st.cache_data(max_entries=512, show_spinner=False)
+def summary_pdf(cache_key, year, _df_year, _district_stats, _district_years):
+    selected_state, district, _ = cache_key
+    return run_export(("summary.pdf", cache_key, year), lambda: pdf_bytes(
+        build_summary_pdf(_df_year, _district_stats, _district_years, year, district, selected_state)))
+
+
+@section("summary_report", "📄 Farmer-Friendly Summary Report",
+         ("df_year", "district_stats", "district_years", "year", "district", "cache_key", "snapshot"))
+def summary_report(df_year, district_stats, district_years, year, district, cache_key, snapshot):
+    st.markdown("Generate a simple summary PDF in easy language for farmers to understand trends in climate and yield.")
+
+    # 👉 Button to trigger PDF
+    if st.button("📄 Generate PDF Summary"):
+        try:
+            data = snapshot_export(snapshot, "summary.pdf",
+                                   lambda: summary_pdf(cache_key, year, df_year, district_stats, district_years))
+            st.download_button(
+                label="📥 Download Summary PDF",
+                data=data,
+                file_name=summary_filename(district, year),
+                mime="application/pdf"
+            )
+        except UnicodeEncodeError:
+            st.error("⚠️ PDF generation failed due to unsupported characters. Emojis and special symbols are automatically removed.")
+
@@ -0,0 +1,62 @@
+# === Single-flight deduplication ===
+# When many sessions open the same district-year at once (a field training, a
+# shared link), each of them would otherwise load the district, derive its stats
+# and build its figures and exports in parallel, all competing for the GIL. A
+# SingleFlight lets the first caller for a key compute it while the others wait
+# for and share that result; once it is done, the key is free again and the
+# caches behind it (catalog LRU, figure cache, st.cache_data) take over.
+# DASHBOARD_SINGLE_FLIGHT=0 turns deduplication off, e.g. to measure its effect
+# with benchmarks/loadtest.py.
+import os
+import threading
+
+SINGLE_FLIGHT_ENABLED = os.environ.get("DASHBOARD_SINGLE_FLIGHT", "1") == "1"
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Concurrent do() calls with the same key run fn once and share its result (or exception)."""
+
+    def __init__(self, enabled=SINGLE_FLIGHT_ENABLED):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.calls = {}
+        self.runs = self.shared = 0
+
+    def do(self, key, fn):
+        if not self.enabled:
+            return fn()
+        with self.lock:
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = _Call()
+                self.runs += 1
+            else:
+                self.shared += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        with self.lock:
+            return len(self.calls)
@@ -0,0 +1,168 @@
+# === Snapshot bundles ===
+# Historical district-years do not change between ingests, so an offline job can
+# render each one ahead of time:
+#
+#     python snapshot.py --workers 4
+#
+# For every district-year the job runs each dashboard section headlessly and keeps
+# the figure JSON they leave in the figure cache, the API's metrics and both
+# export files, in SNAPSHOT_DIR/<state>/<district>/:
+#   <year>.json                          figures and metrics
+#   <year>.summary.pdf, <year>.trend.xlsx
+#   snapshot.json                        data version and source file stat, written last
+# app.py seeds the figure cache from a bundle and serves its exports; api.py serves
+# its metrics. A district whose data changed afterwards (new ingest, edited source)
+# no longer matches snapshot.json and is computed live until the job runs again;
+# the job itself only re-renders such districts. Bump SNAPSHOT_FORMAT when the
+# sections' output changes.
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from data_store import write_atomic
+from ingest import delta_file
+
+SNAPSHOT_DIR = os.environ.get("DASHBOARD_SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_MANIFEST = "snapshot.json"
+
+
+def district_dir(root, state, district):
+    return os.path.join(root, os.path.splitext(delta_file(state, district))[0])
+
+
+def source_stat(path):
+    if path is None:
+        return None
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_current(manifest, entry):
+    try:
+        return (manifest is not None and manifest.get("format") == SNAPSHOT_FORMAT
+                and manifest["version"] == entry.version and manifest["source"] == source_stat(entry.path))
+    except OSError:
+        return False
+
+
+class Bundle:
+    """One pre-rendered district-year."""
+
+    def __init__(self, directory, year, data):
+        self.directory = directory
+        self.year = year
+        self.figures = data["figures"]
+        self.metrics = data["metrics"]
+
+    def export(self, name):
+        try:
+            with open(os.path.join(self.directory, f"{self.year}.{name}"), "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+
+def read_bundle(entry, year, root=SNAPSHOT_DIR):
+    """The bundle for a district-year if the snapshot still matches the district's data, else None."""
+    if not root:
+        return None
+    directory = district_dir(root, entry.state, entry.name)
+    if not is_current(read_json(os.path.join(directory, SNAPSHOT_MANIFEST)), entry):
+        return None
+    data = read_json(os.path.join(directory, f"{year}.json"))
+    return Bundle(directory, year, data) if data is not None else None
+
+
+# === Pre-render job ===
+def render_district(catalog, state, district, root=SNAPSHOT_DIR):
+    """Write every year's bundle for one district; returns the number of years rendered."""
+    from api import district_metrics
+    from figures import figure_cache
+    from reports import build_summary_pdf, pdf_bytes, trend_excel_bytes
+    from sections import SECTIONS, SectionContext, trend_tables
+
+    entry = catalog.index[state][district]
+    loaded = catalog.load(state, district)
+    directory = district_dir(root, state, district)
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, SNAPSHOT_MANIFEST)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    # Stat the source before reading it, so an edit made mid-render invalidates the snapshot
+    source = source_stat(entry.path)
+
+    for year in loaded.years.years:
+        year = int(year)
+        ctx = SectionContext(state, district, year, loaded.frame, loaded.years, loaded.stats, loaded.version)
+        figure_cache.clear()
+        for section in SECTIONS:
+            section.run(ctx)
+        bundle = {"figures": figure_cache.specs(ctx.cache_key), "metrics": district_metrics(loaded, year)}
+        write_atomic(os.path.join(directory, f"{year}.json"), json.dumps(bundle, ensure_ascii=False), "w")
+
+        try:
+            pdf = pdf_bytes(build_summary_pdf(ctx.df_year, loaded.stats, loaded.years, year, district, state))
+            write_atomic(os.path.join(directory, f"{year}.summary.pdf"), pdf)
+        except UnicodeEncodeError:
+            pass  # the dashboard reports this when the button is pressed
+        left, right = trend_tables(loaded.stats, loaded.years, year)
+        if left is not None and right is not None:
+            write_atomic(os.path.join(directory, f"{year}.trend.xlsx"), trend_excel_bytes(left, right))
+
+    manifest = {"format": SNAPSHOT_FORMAT, "version": loaded.version, "source": source,
+                "years": [int(y) for y in loaded.years.years]}
+    write_atomic(manifest_path, json.dumps(manifest), "w")
+    return len(loaded.years.years)
+
+
+_worker_catalog = None
+
+
+def _init_worker():
+    global _worker_catalog
+    # Sections run without a Streamlit session; silence its bare-mode warnings
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+    from catalog import DatasetCatalog
+    _worker_catalog = DatasetCatalog.discover()
+
+
+def _render(task):
+    state, district, root = task
+    return state, district, render_district(_worker_catalog, state, district, root)
+
+
+def stale_districts(catalog, root=SNAPSHOT_DIR, force=False):
+    return [
+        (state, district) for state, districts in catalog.index.items() for district, entry in districts.items()
+        if force or not is_current(read_json(os.path.join(district_dir(root, state, district), SNAPSHOT_MANIFEST)), entry)
+    ]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-render every district-year of the dashboard.")
+    parser.add_argument("--root", default=SNAPSHOT_DIR)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", action="store_true", help="Re-render districts whose snapshot is current")
+    args = parser.parse_args(argv)
+
+    from catalog import DatasetCatalog
+    tasks = [(state, district, args.root) for state, district in stale_districts(DatasetCatalog.discover(), args.root, args.force)]
+    print(f"{len(tasks)} district(s) to render with {args.workers} worker(s)")
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker) as pool:
+        for state, district, years in pool.map(_render, tasks):
+            print(f"{state} / {district}: {years} year(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# === Precomputed per-district statistics ===
+# Everything the dashboard derives from a whole district history (yield quartiles,
+# the 2015–2019 baseline, climate anomalies and warning flags, cumulative seasonal
+# shares) is computed once here for every year, so a rerun only does array lookups.
+import numpy as np
+
+from anomalies import Anomalies, Baseline
+from data_store import YearIndex
+
+MONTHS = ['June', 'July', 'Aug', 'Sept', 'Oct', 'Nov', 'Dec']
+MONTH_NUMS = ['6', '7', '8', '9', '10', '11', '12']
+VAR_PREFIX_MAP = {
+    "temp": "Temperature (°C)",
+    "humidity": "Humidity (%)",
+    "et0": "ET₀ (mm/day)",
+    "precip_frac": "Precipitation Fraction",
+    "precip_flux": "Rainfall (mm/day)",
+    "tmax": "Max Temp (°C)",
+    "tmin": "Min Temp (°C)"
+}
+SEASON_MONTHS = {
+    "Monsoon": ['6', '7', '8', '9'],
+    "Post-monsoon": ['10', '11']
+}
+RAIN_COLS = [f"precip_flux_{m}" for m in MONTH_NUMS]
+# (month × season) 0/1 matrix: rain @ SEASON_MASK gives every season's total at once
+SEASON_MASK = np.array([[m in months for months in SEASON_MONTHS.values()] for m in MONTH_NUMS], dtype=float)
+BASELINE_YEARS = (2015, 2019)
+WARNING_WINDOW = 5
+# (variables × months) columns, in the order anomaly arrays use
+CLIMATE_COLUMNS = [f"{prefix}_{m}" for prefix in VAR_PREFIX_MAP for m in MONTH_NUMS]
+ANOMALY_BASELINES = {
+    "prior_5y": Baseline.rolling(WARNING_WINDOW),
+    "2015-2019": Baseline.fixed(*BASELINE_YEARS),
+    "climatology": Baseline.climatology(),
+}
+RAIN = list(VAR_PREFIX_MAP).index("precip_flux")
+WARNING_THRESHOLD = 0.25  # Section 2: relative deviation from the prior-5-year mean
+RAIN_STATUS_THRESHOLD = 0.2  # Section 6: relative deviation from the 2015–2019 mean
+YIELD_BADGES = {"Good": "🟢 Good", "Moderate": "🟡 Moderate", "Risk": "🔴 Risk"}
+RAIN_BADGES = {"Low": "❌ Low", "Normal": "✅ Normal", "High": "☔ High"}
+
+
+def _window_means(values, lo, hi):
+    # Mean of values[lo:hi] for every row at once, via prefix sums (NaN when empty)
+    csum = np.vstack([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+    counts = (hi - lo).astype(float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (csum[hi] - csum[lo]) / counts.reshape((-1,) + (1,) * (values.ndim - 1))
+
+
+def seasonal_rainfall(data):
+    """Season sums and June–Dec totals for every district and year in one matrix product.
+
+    Returns {district: (season_sums, june_dec_total)} with rows in each frame's order;
+    months missing from a sheet count as zero rainfall.
+    """
+    districts = list(data)
+    rain = np.nan_to_num(np.vstack([data[d].reindex(columns=RAIN_COLS).to_numpy(dtype=float) for d in districts]))
+    season_sums = rain @ SEASON_MASK
+    totals = rain.sum(axis=1)
+    bounds = np.cumsum([0] + [len(data[d]) for d in districts])
+    return {
+        d: (season_sums[start:stop], totals[start:stop])
+        for d, start, stop in zip(districts, bounds[:-1], bounds[1:])
+    }
+
+
+class DistrictStats:
+    def __init__(self, df, rainfall=None):
+        if not df["year"].is_monotonic_increasing:
+            df = df.sort_values("year", kind="stable")
+        self.years = df["year"].to_numpy()
+        self.index = YearIndex(self.years)
+
+        # --- Yield quartiles for the status badge ---
+        self.q25, self.q75 = np.quantile(df["yield"].to_numpy(), [0.25, 0.75])
+
+        # --- 2015–2019 baseline means for every numeric column ---
+        numeric = df.select_dtypes("number")
+        baseline_rows = self.index.window(numeric, *BASELINE_YEARS).to_numpy()
+        if len(baseline_rows):
+            means = baseline_rows.mean(axis=0)
+        else:
+            means = np.full(numeric.shape[1], np.nan)
+        self.baseline = dict(zip(numeric.columns, means))
+
+        # --- Climate columns as (years × variables × months), a view where possible ---
+        climate = df.reindex(columns=CLIMATE_COLUMNS).to_numpy()
+        self.climate = climate.reshape(len(df), len(VAR_PREFIX_MAP), len(MONTH_NUMS))
+
+        # --- Warning flags: Section 2 (prior 5 years, 25%) and Section 6 (2015–2019, 20%) ---
+        # Only the flags are kept here; full anomalies are built on first use by anomalies()
+        rain = self.climate[:, RAIN:RAIN + 1]
+        prior = Anomalies(rain, self.years, ANOMALY_BASELINES["prior_5y"])
+        self.monsoon_deviation = np.abs(prior.deviation[:, 0])
+        self.monsoon_warning = (self.monsoon_deviation > WARNING_THRESHOLD).any(axis=1)
+        rain_deviation = Anomalies(rain, self.years, ANOMALY_BASELINES["2015-2019"]).deviation[:, 0]
+        self.rain_level = np.select([rain_deviation < -RAIN_STATUS_THRESHOLD, rain_deviation > RAIN_STATUS_THRESHOLD],
+                                    ["Low", "High"], "Normal")
+
+        # --- Seasonal totals and shares for every year ---
+        if rainfall is None:
+            rainfall = seasonal_rainfall({None: df})[None]
+        self.season_sums, self.june_dec_total = rainfall
+        with np.errstate(invalid="ignore", divide="ignore"):
+            # Share of the monsoon + post-monsoon total (pie chart, share trend)
+            self.season_share_pct = self.season_sums / self.season_sums.sum(axis=1)[:, None] * 100
+            # Share of the whole June–Dec total (comparison tables)
+            share_of_total = self.season_sums / self.june_dec_total[:, None]
+
+        # --- Cumulative seasonal share of June–Dec rainfall (first year .. Y-1) ---
+        hi = np.searchsorted(self.years, self.years - 1, side="right")
+        self.cumulative_share = _window_means(share_of_total, np.zeros_like(hi), hi) * 100
+        self.share_of_total_pct = share_of_total * 100
+        self._anomalies = {}
+
+    def row(self, year):
+        return self.index.position(year)
+
+    def yield_level(self, value):
+        return "Good" if value >= self.q75 else "Risk" if value <= self.q25 else "Moderate"
+
+    def yield_category(self, value):
+        return YIELD_BADGES[self.yield_level(value)]
+
+    def baseline_mean(self, cols):
+        return np.array([self.baseline[c] for c in cols])
+
+    def anomalies(self, baseline="climatology"):
+        """Anomalies of every variable and month, for every year, against one of ANOMALY_BASELINES."""
+        # Built once per baseline and kept with the stats (percentiles included, once
+        # computed), so API misses and snapshot builds for other years reuse them
+        anomalies = self._anomalies.get(baseline)
+        if anomalies is None:
+            anomalies = self._anomalies[baseline] = Anomalies(self.climate, self.years, ANOMALY_BASELINES[baseline])
+        return anomalies
+
+    def cumulative_season_share(self, year):
+        return dict(zip(SEASON_MONTHS, self.cumulative_share[self.row(year)]))
+
+    def season_totals(self, year):
+        return dict(zip(SEASON_MONTHS, self.season_sums[self.row(year)]))
+
+    def season_share(self, year):
+        return dict(zip(SEASON_MONTHS, self.season_share_pct[self.row(year)]))
+
+    def season_share_of_total(self, year):
+        return dict(zip(SEASON_MONTHS, self.share_of_total_pct[self.row(year)]))
+
+    def share_trend(self):
+        """Years plus one percent series per season, for the whole history."""
+        return self.years, dict(zip(SEASON_MONTHS, self.season_share_pct.T))
+
+
+def build_stats(data):
+    data = {district: df.sort_values("year", kind="stable") for district, df in data.items()}
+    rainfall = seasonal_rainfall(data)
+    return {district: DistrictStats(df, rainfall[district]) for district, df in data.items()}
+
+
+# === Per-year indicators shared by the dashboard sections and the API ===
+# Both read the warning flags precomputed in DistrictStats.
+def monsoon_deviation(district_stats, year):
+    """Per-month relative deviation of June–Dec rainfall from the prior-5-year mean."""
+    return district_stats.monsoon_deviation[district_stats.row(year)]
+
+
+def monsoon_warning(district_stats, year):
+    return bool(district_stats.monsoon_warning[district_stats.row(year)])
+
+
+def monthly_rainfall_status(df_year, district_stats, year):
+    """[(month label, rainfall, level)] for each month vs its 2015–2019 mean."""
+    levels = district_stats.rain_level[district_stats.row(year)]
+    rows = []
+    for m, level in zip(MONTH_NUMS, levels):
+        col = f"precip_flux_{m}"
+        if col not in df_year.columns or col not in district_stats.baseline:
+            continue
+
+        # Safe indexing: ensure m is between '6' and '12'
+        month_idx = int(m) - 6
+        if 0 <= month_idx < len(MONTHS):
+            month_label = MONTHS[month_idx]
+        else:
+            month_label = f"Month {m}"  # fallback label
+
+        rows.append((month_label, df_year[col].values[0], str(level)))
+    return rows
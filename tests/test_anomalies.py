@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from anomalies import Anomalies, Baseline
+from ingest import VALUE_COLUMNS
+from stats import DistrictStats
+
+
+def brute_force(values, years, baseline):
+    """Anomalies one year at a time, straight from each year's baseline rows."""
+    lo, hi = baseline.bounds(years)
+    out = {name: np.full(values.shape, np.nan) for name in ("mean", "std", "zscore", "percentile")}
+    for i in range(len(years)):
+        window = values[lo[i]:hi[i]]
+        for v in range(values.shape[1]):
+            for m in range(values.shape[2]):
+                sample = window[:, v, m][~np.isnan(window[:, v, m])]
+                x = values[i, v, m]
+                if len(sample) == 0:
+                    continue
+                out["mean"][i, v, m] = sample.mean()
+                if not np.isnan(x):
+                    out["percentile"][i, v, m] = (sample <= x).mean() * 100
+                if len(sample) > 1:
+                    std = sample.std(ddof=1)
+                    out["std"][i, v, m] = std
+                    if std > 0:
+                        out["zscore"][i, v, m] = (x - sample.mean()) / std
+    return out
+
+
+@pytest.fixture
+def climate():
+    rng = np.random.default_rng(0)
+    # Gaps in the years and missing values, like real district histories
+    years = np.array([1981, 1982, 1983, 1985, 1986, 1990, 1991, 1992, 1993, 1994, 2015, 2016, 2017, 2019, 2020])
+    values = rng.gamma(2.0, 50.0, size=(len(years), 3, 4))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    values[4, 1, :] = 7.0  # a constant stretch: zero spread within some windows
+    values[5, 1, :] = 7.0
+    return years, values
+
+
+@pytest.mark.parametrize("baseline", [
+    Baseline.rolling(5), Baseline.rolling(1), Baseline.fixed(2015, 2019), Baseline.climatology(),
+], ids=["rolling5", "rolling1", "fixed", "climatology"])
+def test_matches_brute_force(climate, baseline):
+    years, values = climate
+    anomalies = Anomalies(values, years, baseline)
+    expected = brute_force(values, years, baseline)
+    for name, want in expected.items():
+        np.testing.assert_allclose(getattr(anomalies, name), want, rtol=1e-9, atol=1e-9, err_msg=name)
+
+
+def test_one_year_baseline_has_no_zscore():
+    years = np.array([2020])
+    anomalies = Anomalies(np.full((1, 1, 2), 5.0), years, Baseline.climatology())
+    assert np.isnan(anomalies.zscore).all()
+    assert np.isnan(anomalies.std).all()
+    np.testing.assert_array_equal(anomalies.percentile, 100.0)
+
+
+def test_leading_axes_match_per_district(climate):
+    years, values = climate
+    state = np.stack([values, values[::-1] * 2])
+    together = Anomalies(state, years, Baseline.rolling(5))
+    for d in range(2):
+        alone = Anomalies(state[d], years, Baseline.rolling(5))
+        np.testing.assert_allclose(together.zscore[d], alone.zscore)
+        np.testing.assert_allclose(together.percentile[d], alone.percentile)
+
+
+def test_district_stats_builds_anomalies_once_per_baseline(climate):
+    years, _ = climate
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame(rng.gamma(2.0, 50.0, size=(len(years), len(VALUE_COLUMNS))), columns=VALUE_COLUMNS)
+    df.insert(0, "year", years)
+    stats = DistrictStats(df)
+    anomalies = stats.anomalies()
+    assert stats.anomalies() is anomalies
+    assert stats.anomalies("prior_5y") is not anomalies
+    np.testing.assert_allclose(anomalies.zscore, Anomalies(stats.climate, years, Baseline.climatology()).zscore)
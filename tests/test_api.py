@@ -0,0 +1,76 @@
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from api import MetricsService, QueryError, metrics_batch, parse_year
+from catalog import DatasetCatalog
+from ingest import VALUE_COLUMNS, ingest
+
+
+@pytest.fixture
+def service(tmp_path):
+    rows = [{"location_name": "Foo", "year": year, **dict.fromkeys(VALUE_COLUMNS, float(year - 2015))}
+            for year in (2016, 2017, 2018)]
+    ingest(pd.DataFrame(rows), "Assam", str(tmp_path))
+    catalog = DatasetCatalog.discover(root=str(tmp_path / "data"), workbook=None, ingest_root=str(tmp_path))
+    catalog.refresh()
+    return MetricsService(catalog)
+
+
+def batch(service, queries):
+    async def body():
+        return {"queries": queries}
+
+    request = SimpleNamespace(app=SimpleNamespace(state=SimpleNamespace(service=service)), json=body)
+    response = asyncio.run(metrics_batch(request))
+    return response.status_code, json.loads(response.body)
+
+
+def test_parse_year():
+    assert parse_year("2017") == parse_year(2017) == parse_year(2017.0) == 2017
+    for bad in ("2017.5", 2017.7, True, None, "abc"):
+        with pytest.raises(QueryError):
+            parse_year(bad)
+
+
+def test_key_validation(service):
+    version = service.catalog.index["Assam"]["Foo"].version
+    assert service.key({"district": "Foo", "year": "2017"}) == ("Assam", "Foo", version, 2017)
+    assert service.key({"state": "", "district": "Foo", "year": 2017}) == ("Assam", "Foo", version, 2017)
+    for query in ([], {"district": ["Foo"], "year": 2017}, {"state": 1, "district": "Foo", "year": 2017}):
+        with pytest.raises(QueryError) as e:
+            service.key(query)
+        assert e.value.status == 400
+    with pytest.raises(QueryError) as e:
+        service.key({"district": "Bar", "year": 2017})
+    assert e.value.status == 404
+
+
+def test_batch_keeps_query_order_and_caches(service):
+    queries = [
+        {"district": "Foo", "year": 2017},
+        {"district": "Foo", "year": 1990},
+        {"district": "Bar", "year": 2017},
+        {"district": "Foo", "year": "2017"},
+        {"district": "Foo", "year": 2018},
+    ]
+    status, body = batch(service, queries)
+    assert status == 200
+    first, missing_year, unknown, repeat, last = body["results"]
+    assert (first["district"], first["year"], first["yield"]["value"]) == ("Foo", 2017, 2.0)
+    assert repeat == first and last["yield"]["value"] == 3.0
+    assert missing_year == {"error": "no data for Foo in 1990", "query": queries[1]}
+    assert unknown["query"] == queries[2] and "unknown district" in unknown["error"]
+    # Errors are not cached; the two Foo-2017 queries were computed once
+    assert (service.misses, len(service.entries)) == (2, 2)
+
+    batch(service, queries[:1])
+    assert service.hits == 1
+
+
+def test_batch_rejects_malformed_bodies(service):
+    assert batch(service, "Foo")[0] == 400
+    assert batch(service, [{}] * 1001)[0] == 400
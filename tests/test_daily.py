@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from catalog import DatasetCatalog
+from daily import ingest_daily, monthly_rollup, read_daily
+from ingest import VALUE_COLUMNS, ingest
+
+
+def daily_rows(district, start, stop, variable="precip_flux", value=1.0):
+    dates = pd.date_range(start, stop)
+    return pd.DataFrame({"location_name": district, "date": dates, "variable": variable, "value": value})
+
+
+@pytest.fixture
+def roots(tmp_path):
+    return str(tmp_path / "daily"), str(tmp_path / "ingested")
+
+
+def test_rollup_keeps_only_complete_months():
+    daily = pd.concat([
+        daily_rows("Foo", "2021-06-01", "2021-07-10", value=2.0),
+        daily_rows("Foo", "2021-06-01", "2021-06-30", variable="temp", value=25.0),
+    ])
+    daily["date"] = pd.to_datetime(daily["date"])
+    assert monthly_rollup(daily) == {"precip_flux_6": 60.0, "temp_6": 25.0}
+
+
+def test_resent_days_replace_stored_ones(tmp_path, roots):
+    root, ingest_root = roots
+    first, second = tmp_path / "first.csv", tmp_path / "second.csv"
+    daily_rows("Foo", "2021-06-01", "2021-06-30").to_csv(first, index=False)
+    daily_rows("Foo", "2021-06-15", "2021-06-15", value=5.0).to_csv(second, index=False)
+    ingest_daily([str(first)], "Assam", root, ingest_root, chunk_rows=7)
+    ingest_daily([str(second)], "Assam", root, ingest_root)
+
+    stored = read_daily("Assam", "Foo", 2021, root)
+    assert len(stored) == 30
+    assert stored["value"].sum() == 29 * 1.0 + 5.0
+
+
+def test_daily_only_district_is_listed_once_it_has_a_complete_year(tmp_path, roots):
+    root, ingest_root = roots
+    path = tmp_path / "rain.csv"
+    daily_rows("Foo", "2021-06-01", "2021-07-10").to_csv(path, index=False)
+    ingest_daily([str(path)], "Assam", root, ingest_root)
+
+    catalog = DatasetCatalog.discover(root=str(tmp_path / "data"), workbook=None, ingest_root=ingest_root)
+    catalog.refresh()
+    assert "Foo" not in catalog.state_district_map().get("Assam", [])
+    with pytest.raises(KeyError):
+        catalog.load("Assam", "Foo")
+
+    row = {"location_name": "Foo", "year": 2020, **dict.fromkeys(VALUE_COLUMNS, 1.0)}
+    ingest(pd.DataFrame([row]), "Assam", ingest_root)
+    catalog.refresh()
+    assert catalog.state_district_map()["Assam"] == ["Foo"]
+    loaded = catalog.load("Assam", "Foo")
+    # 2021 only has June rainfall so far, so it stays out until its yield arrives
+    np.testing.assert_array_equal(loaded.years.years, [2020])
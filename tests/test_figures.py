@@ -0,0 +1,85 @@
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from figures import FigureCache, downsample, lttb
+
+
+def lttb_reference(x, y, n):
+    """Largest-Triangle-Three-Buckets as originally described, one bucket at a time."""
+    size = len(x)
+    if n >= size or n < 3:
+        return list(range(size))
+    edges = np.linspace(1, size - 1, n - 1).astype(int)
+    picked, a = [0], 0
+    for i in range(n - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (size - 1, size)
+        avg_x, avg_y = np.mean(x[next_lo:next_hi]), np.mean(y[next_lo:next_hi])
+        best, best_area = lo, -1.0
+        for j in range(lo, hi):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        picked.append(best)
+        a = best
+    picked.append(size - 1)
+    return picked
+
+
+def test_lttb_matches_reference():
+    rng = np.random.default_rng(1)
+    for size, n in [(10, 5), (1000, 50), (5003, 1500), (300, 299)]:
+        x = np.sort(rng.uniform(0, 1000, size))
+        y = np.cumsum(rng.normal(size=size))
+        assert list(lttb(x, y, n)) == lttb_reference(x, y, n)
+
+
+def test_lttb_keeps_short_series():
+    x = np.arange(5.0)
+    assert list(lttb(x, x, 10)) == [0, 1, 2, 3, 4]
+    assert list(lttb(x, x, 2)) == [0, 1, 2, 3, 4]
+
+
+def test_downsample_keeps_peak():
+    x = np.arange(10_000.0)
+    y = np.zeros_like(x)
+    y[6_789] = 100.0
+    dx, dy = downsample(x, y, 200)
+    assert len(dx) == 200
+    assert dy.max() == 100.0 and dx[dy.argmax()] == 6_789
+
+
+def bar(value):
+    return go.Figure(go.Bar(x=["a"], y=[value]))
+
+
+def test_figure_cache_builds_each_figure_once():
+    cache, builds = FigureCache(2**20), []
+    build = lambda: builds.append(1) or bar(1)  # noqa: E731
+    first = cache.get("chart", "Foo", 2020, build)
+    second = cache.get("chart", "Foo", 2020, build)
+    assert len(builds) == 1 and (cache.hits, cache.misses) == (1, 1)
+    assert second.to_dict() == first.to_dict() == bar(1).to_dict()
+
+
+def test_figure_cache_evicts_least_recently_used():
+    size = len(pio.to_json(bar(1), validate=False))
+    cache = FigureCache(2 * size)
+    for year in (2019, 2020):
+        cache.get("chart", "Foo", year, lambda: bar(1))
+    cache.get("chart", "Foo", 2019, lambda: bar(1))
+    cache.get("chart", "Foo", 2021, lambda: bar(1))
+    assert list(cache.entries) == [("Foo", 2019, "chart"), ("Foo", 2021, "chart")]
+    assert cache.size == 2 * size
+
+
+def test_figure_cache_preload_keeps_built_figures():
+    cache = FigureCache(2**20)
+    cache.get("chart", "Foo", 2020, lambda: bar(1))
+    stale = pio.to_json(bar(2), validate=False)
+    cache.preload("Foo", [("chart", 2020, stale), ("chart", 2021, stale)])
+    assert cache.get("chart", "Foo", 2020, lambda: bar(3)).to_dict() == bar(1).to_dict()
+    assert cache.get("chart", "Foo", 2021, lambda: bar(3)).to_dict() == bar(2).to_dict()
+    assert sorted(year for _, year, _ in cache.specs("Foo")) == [2020, 2021]
+    assert cache.specs("Bar") == []
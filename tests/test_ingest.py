@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+
+from catalog import DatasetCatalog
+from ingest import VALUE_COLUMNS, SchemaError, ingest, read_delta, read_manifest, upsert, validate
+
+
+def row(year, district="Foo", value=1.0, **values):
+    return {"location_name": district, "year": year, **dict.fromkeys(VALUE_COLUMNS, value), **values}
+
+
+def test_validate_reports_schema_problems():
+    with pytest.raises(SchemaError, match="missing columns: yield"):
+        validate(pd.DataFrame([row(2020)]).drop(columns="yield"))
+    with pytest.raises(SchemaError, match="unexpected columns: rain_13"):
+        validate(pd.DataFrame([row(2020, rain_13=1.0)]))
+    with pytest.raises(SchemaError, match="non-numeric"):
+        validate(pd.DataFrame([row(2020, **{"yield": "high"})]))
+    with pytest.raises(SchemaError, match="duplicate"):
+        validate(pd.DataFrame([row(2020), row(2020)]))
+
+
+def test_upsert_replaces_years_and_keeps_values_partial_rows_leave_out():
+    frame = validate(pd.DataFrame([row(2019), row(2020)]))
+    rows = validate(pd.DataFrame([{"location_name": "Foo", "year": 2020, "yield": 5.0},
+                                  {"location_name": "Foo", "year": 2021, "yield": 6.0}]), partial=True)
+    merged = upsert(frame, rows)
+    assert merged["year"].tolist() == [2019, 2020, 2021]
+    assert merged["yield"].tolist() == [1.0, 5.0, 6.0]
+    # 2020 keeps its climate values, 2021 has none to keep
+    assert merged.loc[1, VALUE_COLUMNS[1:]].eq(1.0).all()
+    assert merged.loc[2, VALUE_COLUMNS[1:]].isna().all()
+
+
+def test_ingest_writes_deltas_and_bumps_the_manifest(tmp_path):
+    root = str(tmp_path)
+    counts = ingest(pd.DataFrame([row(2019), row(2020), row(2020, "Bar")]), "Assam", root)
+    assert counts == {("Assam", "Foo"): 2, ("Assam", "Bar"): 1}
+    ingest(pd.DataFrame([row(2020, value=3.0)]), "Assam", root)
+
+    manifest = read_manifest(root)
+    assert manifest["version"] == 2
+    foo, bar = manifest["districts"]["Assam"]["Foo"], manifest["districts"]["Assam"]["Bar"]
+    assert (foo["version"], foo["rows"], bar["version"]) == (2, 2, 1)
+    assert read_delta(root, foo)["yield"].tolist() == [1.0, 3.0]
+
+
+def test_catalog_reloads_only_changed_districts(tmp_path):
+    root = str(tmp_path)
+    ingest(pd.DataFrame([row(2019), row(2020), row(2020, "Bar")]), "Assam", root)
+    catalog = DatasetCatalog.discover(root=str(tmp_path / "data"), workbook=None, ingest_root=root)
+    catalog.refresh()
+    foo, bar = catalog.load("Assam", "Foo"), catalog.load("Assam", "Bar")
+
+    ingest(pd.DataFrame([row(2021, value=2.0)]), "Assam", root)
+    catalog.refresh()
+    assert catalog.load("Assam", "Bar") is bar
+    reloaded = catalog.load("Assam", "Foo")
+    assert reloaded is not foo
+    assert reloaded.frame["year"].tolist() == [2019, 2020, 2021]
@@ -0,0 +1,41 @@
+import numpy as np
+
+from prediction import RIDGE_ALPHAS, RidgeModel
+
+
+def refit_held_out(Z, y, alpha):
+    """Leave-one-out predictions by refitting ridge (unpenalized intercept) without each row."""
+    n, p = Z.shape
+    held_out = np.empty(n)
+    for i in range(n):
+        keep = np.arange(n) != i
+        # Penalize the coefficients but not the intercept column
+        A = np.vstack([np.column_stack([np.ones(keep.sum()), Z[keep]]),
+                       np.column_stack([np.zeros(p), np.sqrt(alpha) * np.eye(p)])])
+        b = np.concatenate([y[keep], np.zeros(p)])
+        coef = np.linalg.lstsq(A, b, rcond=None)[0]
+        held_out[i] = coef[0] + Z[i] @ coef[1:]
+    return held_out
+
+
+def test_closed_form_leave_one_out_matches_refits():
+    rng = np.random.default_rng(2)
+    n, p = 30, 12
+    X = rng.normal(size=(n, p)) * rng.uniform(0.5, 20, p) + rng.uniform(0, 100, p)
+    y = X[:, :3] @ np.array([0.02, -0.01, 0.05]) + rng.normal(0, 0.3, n) + 2
+    model = RidgeModel.fit(X, y, np.arange(1990, 1990 + n), "digest")
+
+    Z = (X - model.mean) / model.scale
+    errors = [np.mean((y - refit_held_out(Z, y, alpha)) ** 2) for alpha in RIDGE_ALPHAS]
+    assert model.alpha == RIDGE_ALPHAS[int(np.argmin(errors))]
+    np.testing.assert_allclose(model.held_out, refit_held_out(Z, y, model.alpha), rtol=1e-8, atol=1e-10)
+
+
+def test_predict_batch_matches_full_fit():
+    rng = np.random.default_rng(3)
+    X = rng.normal(size=(20, 5))
+    y = X @ rng.normal(size=5) + 1
+    model = RidgeModel.fit(X, y, np.arange(20), "digest")
+    Z = (X - model.mean) / model.scale
+    expected = Z @ model.coef + model.intercept
+    np.testing.assert_allclose(RidgeModel.predict_batch([model, model], np.stack([X, X])), [expected, expected])
@@ -0,0 +1,70 @@
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def run_together(flights, n, fn):
+    results, errors = [None] * n, [None] * n
+
+    def worker(i):
+        try:
+            results[i] = flights.do("key", fn)
+        except Exception as e:
+            errors[i] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def test_concurrent_calls_share_one_run():
+    flights, release, calls = SingleFlight(), threading.Event(), []
+
+    def fn():
+        calls.append(1)
+        release.wait()
+        return object()
+
+    threads, results, errors = run_together(flights, 8, fn)
+    while flights.shared < 7:
+        time.sleep(0.001)  # until every follower waits on the leader
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1 and (flights.runs, flights.shared) == (1, 7)
+    assert all(r is results[0] for r in results) and errors == [None] * 8
+    assert flights.in_flight() == 0
+
+
+def test_followers_get_the_leaders_exception():
+    flights, release = SingleFlight(), threading.Event()
+
+    def fn():
+        release.wait()
+        raise ValueError("boom")
+
+    threads, results, errors = run_together(flights, 4, fn)
+    while flights.shared < 3:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join()
+    assert all(isinstance(e, ValueError) for e in errors)
+    # The key is free again, so the next call runs fn anew
+    assert flights.do("key", lambda: 1) == 1 and flights.runs == 2
+
+
+def test_disabled_runs_every_call():
+    flights, calls = SingleFlight(enabled=False), []
+    for _ in range(3):
+        flights.do("key", lambda: calls.append(1))
+    assert len(calls) == 3 and flights.runs == 0
+
+
+def test_leader_exception_propagates():
+    with pytest.raises(KeyError):
+        SingleFlight().do("key", lambda: {}["missing"])